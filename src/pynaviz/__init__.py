@@ -5,12 +5,15 @@ from .base_plot import (
     PlotTsdFrame,
     PlotTsGroup,
 )
+from .memory_budget import MemoryBudget, set_default_memory_budget
 from .video import (
     PlotTsdTensor,
     PlotVideo,
 )
 
 __all__ = [
+    "MemoryBudget",
+    "set_default_memory_budget",
     "PlotIntervalSet",
     "PlotTsd",
     "PlotTsdFrame",
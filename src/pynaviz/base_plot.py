@@ -5,6 +5,8 @@ Create a unique canvas/renderer for each class
 
 import threading
 import warnings
+import weakref
+from abc import ABC, abstractmethod
 from typing import Any, Optional, Union
 
 import matplotlib.pyplot as plt
@@ -19,10 +21,19 @@ from wgpu.gui.auto import run
 
 from .controller import GetController, SpanController, SpanYLockController
 from .interval_set import IntervalSetInterface
+from .memory_budget import (
+    BYTES_PER_SAMPLE,
+    COMPACT_BYTES_PER_SAMPLE,
+    TSD_BYTES_PER_SAMPLE,
+    get_default_memory_budget,
+)
 from .plot_manager import _PlotManager
+from .raster import Raster, RasterMaterial
 from .synchronization_rules import _match_pan_on_x_axis, _match_zoom_on_x_axis
 from .threads.data_streaming import TsdFrameStreaming
-from .threads.metadata_to_color_maps import MetadataMappingThread
+from .threads.metadata_to_color_maps import MetadataMappingThread, map_to_rgba
+from .threads.spike_count_pyramid import SpikeCountPyramid, spike_trains
+from .traces import SAMPLE_DTYPES, TraceMaterial, Traces, nan_value, sample_format
 from .utils import (
     GRADED_COLOR_LIST,
     RenderTriggerSource,
@@ -37,6 +48,46 @@ dict_sync_funcs = {
     "zoom_to_point": _match_zoom_on_x_axis,
 }
 
+# Points streamed per pixel column of the canvas, i.e. two min/max pairs when zoomed out
+POINTS_PER_PIXEL = 4
+
+# The canvas width is rounded up to a multiple of this many pixels, so that resizing
+# the canvas does not reallocate the streaming buffers for every pixel
+PIXEL_STEP = 256
+
+# The time origin of the scene moves to the view when it is more than this many view
+# widths away, which keeps the float32 times on the GPU far below a pixel apart
+ORIGIN_REBASE_WIDTHS = 64
+
+# Rows of a TsdFrame streamed above and below the camera y-range, in camera heights, so
+# that scrolling through the rows reads new ones only once per camera height
+PAGE_MARGIN = 1.0
+
+# Spikes of a TsGroup streamed on each side of the view, in view widths
+SPIKE_MARGIN = 1.0
+
+# Mean number of spikes per unit and per pixel column above which a TsGroup is drawn as
+# a density image of spike counts, since the markers of a unit then overlap
+DENSITY_SPIKES_PER_PIXEL = 0.25
+
+# Interval (in seconds) at which the GUI thread picks up the draws requested by the
+# background threads, which can not use the canvas themselves
+DRAW_POLL_INTERVAL = 1 / 60
+
+
+def _poll_draw_requests(plot_ref: weakref.ref) -> None:
+    """
+    Request the draws asked by background threads since the last call, then poll again.
+    Runs on the GUI thread, until the plot is deleted or its canvas closed.
+    """
+    plot = plot_ref()
+    if plot is None or plot.canvas.is_closed():
+        return
+    if plot._draw_requested.is_set():
+        plot._draw_requested.clear()
+        plot.canvas.request_draw(plot.animate)
+    plot._call_later(DRAW_POLL_INTERVAL, _poll_draw_requests, plot_ref)
+
 
 class _BasePlot(IntervalSetInterface):
     """
@@ -75,6 +126,9 @@ class _BasePlot(IntervalSetInterface):
         A vertical line indicating a reference time point (e.g., center).
     camera : gfx.OrthographicCamera
         Orthographic camera with optional aspect ratio locking.
+    _time_origin : float
+        Time (float64) of the x origin of the scene. The GPU buffers store times relative
+        to it, and the scene is rendered with a copy of the camera shifted by it.
     _cmap : str
         Default colormap name used for visual mapping (e.g., "viridis").
     """
@@ -87,12 +141,17 @@ class _BasePlot(IntervalSetInterface):
 
         # Create a GPU-accelerated canvas for rendering, optionally with a parent widget
         if parent:  # Assuming it's a Qt background
-            from wgpu.gui.qt import WgpuCanvas
+            from wgpu.gui.qt import WgpuCanvas, call_later
             self.canvas = WgpuCanvas(parent=parent)
         else:  # Default to glfw for single canvas
-            from wgpu.gui.auto import WgpuCanvas
+            from wgpu.gui.auto import WgpuCanvas, call_later
             self.canvas = WgpuCanvas()
 
+        # Draws requested from background threads, see `_schedule_draw`
+        self._call_later = call_later
+        self._draw_requested = threading.Event()
+        _poll_draw_requests(weakref.ref(self))
+
         # Create a WGPU-based renderer attached to the canvas
         self.renderer = gfx.WgpuRenderer(
             self.canvas
@@ -116,6 +175,10 @@ class _BasePlot(IntervalSetInterface):
         # Use an orthographic camera to preserve scale without perspective distortion
         self.camera = gfx.OrthographicCamera(maintain_aspect=maintain_aspect)
 
+        # The scene is drawn relative to a time origin, with a shifted copy of the camera
+        self._time_origin = 0.0
+        self._view_camera = gfx.OrthographicCamera(maintain_aspect=maintain_aspect)
+
         # Initialize a separate thread to handle metadata-to-color mapping
         self.color_mapping_thread = MetadataMappingThread(data)
 
@@ -179,31 +242,83 @@ class _BasePlot(IntervalSetInterface):
         -----
         This method should be called whenever the visible region of the plot
         changes (e.g., after zooming, panning, or resizing the canvas).
+        The rulers show absolute times, while the scene is drawn relative to the
+        time origin.
         """
         world_xmin, world_xmax, world_ymin, world_ymax = get_plot_min_max(self)
 
+        # Only the time axis of the span controllers is rebased
+        origin = 0.0
+        if isinstance(self.controller, SpanController):
+            self._update_time_origin(world_xmin, world_xmax)
+            origin = self._time_origin
+        camera = self._get_view_camera(origin)
+
         # X axis
-        self.ruler_x.start_pos = world_xmin, 0, -10
-        self.ruler_x.end_pos = world_xmax, 0, -10
-        self.ruler_x.start_value = self.ruler_x.start_pos[0]
-        self.ruler_x.update(self.camera, self.canvas.get_logical_size())
+        self.ruler_x.start_pos = world_xmin - origin, 0, -10
+        self.ruler_x.end_pos = world_xmax - origin, 0, -10
+        self.ruler_x.start_value = world_xmin
+        self.ruler_x.update(camera, self.canvas.get_logical_size())
 
         # Y axis
-        self.ruler_y.start_pos = 0, world_ymin, -10
-        self.ruler_y.end_pos = 0, world_ymax, -10
+        self.ruler_y.start_pos = -origin, world_ymin, -10
+        self.ruler_y.end_pos = -origin, world_ymax, -10
         self.ruler_y.start_value = self.ruler_y.start_pos[1]
-        self.ruler_y.update(self.camera, self.canvas.get_logical_size())
+        self.ruler_y.update(camera, self.canvas.get_logical_size())
 
         # Center time Ref axis
         self.ruler_ref_time.geometry.positions.data[:, 0] = (
-            world_xmin + (world_xmax - world_xmin) / 2
+            world_xmin + (world_xmax - world_xmin) / 2 - origin
         )
         self.ruler_ref_time.geometry.positions.data[:, 1] = np.array(
             [world_ymin - 10, world_ymax + 10]
         )
         self.ruler_ref_time.geometry.positions.update_full()
 
-        self.renderer.render(self.scene, self.camera)
+        # Rectangles of the intervals in view, also for views not set by the controller
+        self._update_all_isets()
+
+        self.renderer.render(self.scene, camera)
+
+    def _get_view_camera(self, origin: float) -> gfx.OrthographicCamera:
+        """Copy of the camera in the coordinates of the scene, shifted by `origin` in x."""
+        state = self.camera.get_state()
+        position = state["position"].copy()
+        position[0] -= origin
+        state["position"] = position
+        self._view_camera.set_state(state)
+        self._view_camera.set_view_size(*self.renderer.logical_size)
+        return self._view_camera
+
+    def _update_time_origin(self, xmin: float, xmax: float) -> None:
+        """
+        Move the time origin to the center of the view [xmin, xmax] when it is further
+        than `ORIGIN_REBASE_WIDTHS` view widths away.
+
+        The GPU buffers hold float32 times relative to the origin. After a few hours of
+        recording, absolute float32 times are coarser than the sampling period, while
+        times relative to a nearby origin keep their precision.
+        """
+        center = (xmin + xmax) / 2
+        if abs(center - self._time_origin) <= ORIGIN_REBASE_WIDTHS * (xmax - xmin):
+            return
+        shift = self._time_origin - center
+        self._time_origin = center
+        self._rebase(shift)
+
+    def _schedule_draw(self) -> None:
+        """
+        Request a draw from any thread. The canvas can only be used from the GUI thread,
+        which picks up the request within `DRAW_POLL_INTERVAL` seconds.
+        """
+        self._draw_requested.set()
+
+    def _rebase(self, shift: float) -> None:
+        """
+        Update the x coordinates of the scene after the time origin moved by `-shift`.
+        Subclasses rewrite the times of their buffers relative to `_time_origin`.
+        """
+        self._rebase_rectangles(self._interval_rects, self._time_origin)
 
     def show(self):
         """To show the canvas in case of GLFW context used"""
@@ -282,23 +397,32 @@ class _BasePlot(IntervalSetInterface):
             map_to_colors, dict(cmap=colormaps[self.cmap], vmin=vmin, vmax=vmax)
         )
 
-        # Get the material objects that will have their colors updated
-        materials = get_plot_attribute(self, "material")
-
         # Get the metadata values for each plotted element
         values = (
             self.data.get_info(metadata_name) if hasattr(self.data, "get_info") else {}
         )
 
-        # If metadata is found and mapping works, update the material colors
+        # If metadata is found and mapping works, update the colors at once
         if len(values):
-            map_color = map_to_colors(values, **map_kwargs)
-            if map_color:
-                for c in materials:
-                    materials[c].color = map_color[values[c]]
+            values = values.loc[self._manager.index]
+            self._set_colors(map_to_rgba(map_to_colors, values, **map_kwargs))
 
-                # Request a redraw of the canvas to reflect the new colors
-                self.canvas.request_draw(self.animate)
+            # Request a redraw of the canvas to reflect the new colors
+            self.canvas.request_draw(self.animate)
+
+    def _set_colors(self, rgba: np.ndarray) -> None:
+        """
+        Set the color of each plot element.
+
+        Parameters
+        ----------
+        rgba : np.ndarray
+            Float32 array of shape (n_elements, 4), the RGBA color of each element in the
+            order of the plot manager index.
+        """
+        materials = get_plot_attribute(self, "material")
+        for c, color in zip(self._manager.index, rgba, strict=True):
+            materials[c].color = color
 
     def sort_by(self, metadata_name: str, mode: Optional[str] = "ascending"):
         pass
@@ -306,11 +430,127 @@ class _BasePlot(IntervalSetInterface):
     def group_by(self, metadata_name: str):
         pass
 
+    def _set_manager_visible(self, visible: dict) -> None:
+        """Store the visibility of the plot elements in the plot manager."""
+        flags = np.array(self._manager.data["visible"], dtype=bool)
+        position = {k: i for i, k in enumerate(self._manager.index)}
+        for k, v in visible.items():
+            flags[position[k]] = bool(v)
+        self._manager.data["visible"] = flags
+
+    def set_visible(self, visible: dict) -> None:
+        """
+        Show or hide plot elements.
+
+        Parameters
+        ----------
+        visible : dict
+            Mapping from element (TsGroup unit, TsdFrame column or IntervalSet row)
+            to its visibility.
+        """
+        self._set_manager_visible(visible)
+        materials = get_plot_attribute(self, "material")
+        for index, val in visible.items():
+            materials[index].opacity = val
+        self.canvas.request_draw(self.animate)
+
     def close(self):
         self.color_mapping_thread.shutdown()
 
 
-class PlotTsd(_BasePlot):
+class _BaseStreamingPlot(_BasePlot, ABC):
+    """
+    Base class of the plots that stream a window of the data around the view.
+
+    The window holds as many samples as fit in the memory budget, and at most
+    `POINTS_PER_PIXEL` points per pixel column of the canvas. Subclasses set the bytes
+    used per sample and per column in `_bytes_per_sample`, create `_stream` with
+    `_init_window_size` samples and reallocate their buffers in `_reallocate`, which
+    the stream calls when a new window size takes effect.
+    """
+
+    # Bytes used per sample and per column by the streaming buffers
+    _bytes_per_sample = BYTES_PER_SAMPLE
+
+    def _init_window_size(self, memory_budget: Optional[int]) -> int:
+        """Number of samples of the first window. The window follows the canvas width."""
+        if memory_budget is None:
+            memory_budget = get_default_memory_budget()
+        self._budget_samples = self._budget_to_samples(memory_budget)
+        self._screen_samples = self._screen_to_samples(
+            self.renderer.logical_size[0], self.canvas.get_pixel_ratio()
+        )
+        self.renderer.add_event_handler(self._on_resize, "resize")
+        return min(self._budget_samples, self._screen_samples)
+
+    def animate(self):
+        """Flush the window read in the background since the last draw, then draw."""
+        if isinstance(self.controller, SpanController):
+            self._stream.apply()
+        super().animate()
+
+    def _budget_to_samples(self, nbytes: int) -> int:
+        """Number of samples per column of a streaming window that fits in `nbytes`."""
+        n_columns = self.data.shape[1] if self.data.ndim > 1 else 1
+        return max(int(nbytes) // (n_columns * self._bytes_per_sample), 1)
+
+    @staticmethod
+    def _screen_to_samples(width: float, pixel_ratio: float) -> int:
+        """Number of samples per column of a streaming window for a canvas width."""
+        pixels = max(int(np.ceil(width * pixel_ratio)), 1)
+        pixels = -(-pixels // PIXEL_STEP) * PIXEL_STEP
+        # The streaming window spans three widths of the view
+        return 3 * pixels * POINTS_PER_PIXEL
+
+    def _on_resize(self, event):
+        """Follow the canvas width with the number of streamed samples."""
+        self._screen_samples = self._screen_to_samples(event.width, event.pixel_ratio)
+        self._resize_stream()
+
+    def set_memory_budget(self, nbytes: int) -> None:
+        """
+        Resize the streaming window so that the buffers fit in a memory budget.
+
+        Parameters
+        ----------
+        nbytes : int
+            Memory budget in bytes.
+        """
+        self._budget_samples = self._budget_to_samples(nbytes)
+        self._resize_stream()
+
+    def _resize_stream(self):
+        """Resize the streaming window to fit both the memory budget and the canvas."""
+        n = min(self._budget_samples, self._screen_samples)
+        if min(n, self.data.shape[0]) == self._stream.next_max_n:
+            return
+        if isinstance(self.controller, SpanController):
+            # The buffers are reallocated once the new window is read in the background
+            self._request_window(max_n=n)
+        else:
+            # Nothing is streamed until switching back to the span controller
+            self._stream.resize(n)
+            self._reallocate()
+
+    def _request_window(self, **kwargs):
+        """Request the window around the view, with the arguments of `_stream.request`."""
+        start, end = self.controller.get_xlim()
+        self._stream.request(position=((start + end) / 2, 0, 0), width=end - start, **kwargs)
+        self.canvas.request_draw(self.animate)
+
+    @abstractmethod
+    def _reallocate(self):
+        """
+        Reallocate the buffers after a change of the window size. The buffers are left
+        empty, the stream flushes the new window right after.
+        """
+
+    def close(self):
+        super().close()
+        self._stream.close()
+
+
+class PlotTsd(_BaseStreamingPlot):
     """
     A time series plot for `nap.Tsd` objects using GPU-accelerated rendering.
 
@@ -318,6 +558,9 @@ class PlotTsd(_BasePlot):
     user interaction through a `SpanController`. It supports optional synchronization
     across multiple plots and rendering via WebGPU.
 
+    Only a window of the series around the view is held in memory. It is streamed
+    when panning or zooming, and decimated with a min/max envelope when zoomed out.
+
     Parameters
     ----------
     data : nap.Tsd
@@ -326,6 +569,9 @@ class PlotTsd(_BasePlot):
         Controller index used for synchronized interaction (e.g., panning across multiple plots).
     parent : Optional[Any], default=None
         Optional parent widget (e.g., in a Qt context).
+    memory_budget : Optional[int], default=None
+        Maximum memory (in bytes) used by the streaming buffers. Defaults to the global
+        default memory budget. It can be changed later with `set_memory_budget`.
 
     Attributes
     ----------
@@ -335,27 +581,39 @@ class PlotTsd(_BasePlot):
         The main line plot showing the time series.
     """
 
+    _bytes_per_sample = TSD_BYTES_PER_SAMPLE
+
     def __init__(
-        self, data: nap.Tsd, index: Optional[int] = None, parent: Optional[Any] = None
+        self,
+        data: nap.Tsd,
+        index: Optional[int] = None,
+        parent: Optional[Any] = None,
+        memory_budget: Optional[int] = None,
     ) -> None:
         super().__init__(data=data, parent=parent)
 
+        # Stream a window of the series around the view
+        self._stream = TsdFrameStreaming(
+            data,
+            callback=self._flush,
+            max_n=self._init_window_size(memory_budget),
+            on_ready=self._schedule_draw,
+            on_layout=self._reallocate,
+        )
+
         # Create a controller for span-based interaction, syncing, and user inputs
         self.controller = SpanController(
             camera=self.camera,
             renderer=self.renderer,
             controller_id=index,
             dict_sync_funcs=dict_sync_funcs,
-            plot_callbacks=[],
+            plot_callbacks=[self._stream.request],
         )
 
-        # Prepare geometry: stack time, data, and zeros (Z=0) into (N, 3) float32 positions
-        positions = np.stack((data.t, data.d, np.zeros_like(data))).T
-        positions = positions.astype("float32")
-
         # Create a line geometry and material to render the time series
+        self._allocate_buffer()
         self.line = gfx.Line(
-            gfx.Geometry(positions=positions),
+            gfx.Geometry(positions=self._positions),
             gfx.LineMaterial(thickness=4.0, color="#aaf"),  # light blue line
         )
 
@@ -365,12 +623,65 @@ class PlotTsd(_BasePlot):
         # By default showing only the first second.
         # Weirdly rulers don't show if show_rect is not called
         # in the init
-        self.camera.show_rect(0, 1, data.min(), data.max())
+        start = data.t[0] if len(data) else 0.0
+        self._flush(self._stream.get_slice(start=start, end=start + 1))
+        ymin, ymax = self._get_min_max()
+        self.camera.show_rect(start, start + 1, ymin, ymax)
 
         # Request an initial draw of the scene
         self.canvas.request_draw(self.animate)
         # self.controller.show_interval(start=0, end=1)
 
+    def _allocate_buffer(self):
+        """Allocate the positions of a window, nan after the last sample of the window."""
+        self._positions = np.full((self._stream._max_n, 3), np.nan, dtype="float32")
+        self._positions[:, 2] = 0.0
+        self._window_times = np.empty(0)
+
+    def _reallocate(self):
+        self._allocate_buffer()
+        self.line.geometry = gfx.Geometry(positions=self._positions)
+        self._stream.buffer_slice = None
+        self.canvas.request_draw(self.animate)
+
+    def _flush(self, slice_: slice = None):
+        """
+        Write the window `slice_` (by default, around the view) to the positions and
+        upload them. Zoomed out windows hold the min/max envelope of the series.
+        """
+        if slice_ is None:
+            slice_ = self._stream.get_slice(*self.controller.get_xlim())
+        if slice_ == self._stream.buffer_slice:
+            return
+
+        time, values = self._stream.read(slice_)
+        n = time.shape[0]
+        self._window_times = time
+        self._positions[:n, 0] = time - self._time_origin
+        self._positions[:n, 1] = values[:, 0]
+        self._positions[n:, 0:2] = np.nan
+        self.line.geometry.positions.update_full()
+        self._stream.buffer_slice = slice_
+
+    def _get_min_max(self) -> tuple:
+        """
+        Minimum and maximum of the series, from the min/max pyramid of the stream, or
+        from the current window until the pyramid is built.
+        """
+        minmax = self._stream.get_range(self.data.t[0], self.data.t[-1])
+        if minmax is not None:
+            return minmax[0, 0], minmax[0, 1]
+        values = self._positions[:, 1]
+        if np.all(np.isnan(values)):
+            return 0.0, 1.0
+        return float(np.nanmin(values)), float(np.nanmax(values))
+
+    def _rebase(self, shift: float) -> None:
+        super()._rebase(shift)
+        n = self._window_times.shape[0]
+        self._positions[:n, 0] = self._window_times - self._time_origin
+        self.line.geometry.positions.update_full()
+
     def sort_by(self, metadata_name: str, order: Optional[str] = "ascending"):
         pass
 
@@ -378,7 +689,7 @@ class PlotTsd(_BasePlot):
         pass
 
 
-class PlotTsdFrame(_BasePlot):
+class PlotTsdFrame(_BaseStreamingPlot):
     """
     A GPU-accelerated visualization of a multi-columns time series (nap.TsdFrame).
 
@@ -394,6 +705,20 @@ class PlotTsdFrame(_BasePlot):
         Unique ID for synchronizing with external controllers.
     parent : Optional[Any], default=None
         Optional GUI parent (e.g. QWidget in Qt).
+    auto_y : bool, default=False
+        If True, the y range is fitted to the visible data after each pan or zoom.
+        It can be toggled later with `controller.auto_y`.
+    memory_budget : Optional[int], default=None
+        Maximum memory (in bytes) used by the streaming buffers. Defaults to the global
+        default memory budget. It can be changed later with `set_memory_budget`.
+        Within the budget, the number of samples held at once follows the width of
+        the canvas, with `POINTS_PER_PIXEL` points per pixel column.
+    compact : bool, default=False
+        If True, the samples are stored on the GPU with 16 bits (int16 for integer data
+        that fits in an int16, float16 for floats) instead of float32, so that longer
+        windows fit in the memory budget. Other integer data (uint16, 32 or 64 bits)
+        keeps float32 samples, with a warning. With int16 samples, the value -32768
+        breaks the lines like nan, so a genuine -32768 sample is drawn as a gap.
 
     Attributes
     ----------
@@ -410,34 +735,30 @@ class PlotTsdFrame(_BasePlot):
         data: nap.TsdFrame,
         index: Optional[int] = None,
         parent: Optional[Any] = None,
+        auto_y: bool = False,
+        memory_budget: Optional[int] = None,
+        compact: bool = False,
     ):
         super().__init__(data=data, parent=parent)
         self.data = data
+        self._sample_format = sample_format(data.dtype) if compact else "f32"
+        if self._sample_format != "f32":
+            self._bytes_per_sample = COMPACT_BYTES_PER_SAMPLE
 
-        # To stream data
-        size = (256 * 1024**2) // (data.shape[1] * 60)
-
+        # To stream data, with a window that fits in the memory budget and on the canvas
         self._stream = TsdFrameStreaming(
-            data, callback=self._flush, window_size=np.ceil(size / data.rate)
-        )  # seconds
-        # print(size, size/data.rate, self._stream._max_n)
-
-        # Create pygfx objects
-        self._positions = np.full(
-            ((self._stream._max_n + 1) * self.data.shape[1], 3), np.nan, dtype="float32"
+            data,
+            callback=self._flush,
+            max_n=self._init_window_size(memory_budget),
+            on_ready=self._schedule_draw,
+            on_layout=self._reallocate,
         )
-        self._positions[:, 2] = 0.0
+        # Range of each column over the whole data, to page the rows in view
+        self._data_range = None
 
-        self._buffer_slices = {}
-        for c, s in zip(
-            self.data.columns,
-            range(
-                0,
-                len(self._positions) - self._stream._max_n + 1,
-                self._stream._max_n + 1,
-            ),
-        ):
-            self._buffer_slices[c] = slice(s, s + self._stream._max_n)
+        # Create pygfx objects
+        self._colors = np.ones((self.data.shape[1], 4), dtype="float32")
+        self._allocate_buffer()
 
         # Create pygfx object
         self._initialize_graphic()
@@ -456,7 +777,9 @@ class PlotTsdFrame(_BasePlot):
                 renderer=self.renderer,
                 controller_id=index,
                 dict_sync_funcs=dict_sync_funcs,
-                plot_callbacks=[self._stream.stream],
+                plot_callbacks=[self._stream.request],
+                auto_y=auto_y,
+                y_range_func=self._get_y_range,
             ),
             "get": GetController(
                 camera=self.camera,
@@ -475,76 +798,297 @@ class PlotTsdFrame(_BasePlot):
         self.time_point = None
 
         # By default, showing only the first second.
-        self._flush(self._stream.get_slice(start=0, end=1))
+        start = self.data.t[0] if len(self.data) else 0.0
+        self._flush(self._stream.get_slice(start=start, end=start + 1))
         minmax = self._get_min_max()
-        self.controller.set_view(0, 1, np.min(minmax[:, 0]), np.max(minmax[:, 1]))
+        self.controller.set_view(
+            start, start + 1, np.nanmin(minmax[:, 0]), np.nanmax(minmax[:, 1])
+        )
 
         # Request an initial draw of the scene
         self.canvas.request_draw(self.animate)
 
-    def _initialize_graphic(self):
-        colors = np.ones((self._positions.shape[0], 4), dtype=np.float32)
+    def animate(self):
+        """
+        Page the rows in view, flush the window read in the background since the last
+        draw, then draw.
+        """
+        if isinstance(self.controller, SpanController):
+            self._page_rows()
+        super().animate()
 
-        self.graphic = gfx.Line(
-            gfx.Geometry(positions=self._positions, colors=colors),
-            gfx.LineMaterial(
-                thickness=1.0, color_mode="vertex"
-            ),  # , color=GRADED_COLOR_LIST[1 % len(GRADED_COLOR_LIST)]),
+    def _row_extents(self, rows: np.ndarray) -> tuple:
+        """
+        Lowest and highest y of the given rows in plot coordinates, from the range of
+        their columns over the whole data. The range is read once from the min/max
+        pyramid, and the rows are unbounded until the pyramid is built.
+        """
+        if self._data_range is None:
+            self._data_range = self._stream.get_range(
+                self.data.t[0], self.data.t[-1], exact=False
+            )
+        offset = self._manager.offset[rows]
+        if self._data_range is None:
+            return np.full(len(rows), -np.inf), np.full(len(rows), np.inf)
+        # All-nan columns are reduced to their offset
+        extent = np.nan_to_num(self._data_range[rows], nan=0.0)
+        extent = extent * self._manager.scale[rows, None]
+        return offset + extent.min(1), offset + extent.max(1)
+
+    def _page_rows(self) -> None:
+        """
+        Stream only the visible columns whose row overlaps the camera y-range, plus a
+        margin of `PAGE_MARGIN` camera heights above and below. A row spans the range of
+        its column over the whole data, scaled and shifted by the plot manager.
+
+        The streamed columns change when a row in view is not streamed, when a hidden
+        column is streamed, or when more than twice the rows of the page are streamed.
+        The rows of the new page are then read in the background and uploaded at once
+        by the next `apply`, so that scrolling vertically costs I/O proportional to the
+        rows in view and never blocks the drawing.
+        """
+        visible = np.flatnonzero(self._manager.data["visible"])
+        lo, hi = self._row_extents(visible)
+        y, half_height = self.camera.local.y, self.camera.height / 2
+        in_view = visible[(hi >= y - half_height) & (lo <= y + half_height)]
+        margin = half_height + PAGE_MARGIN * self.camera.height
+        page = visible[(hi >= y - margin) & (lo <= y + margin)]
+
+        # Including a page already requested
+        streamed = self._stream.next_columns
+        if (
+            np.isin(in_view, streamed).all()
+            and np.isin(streamed, visible).all()
+            and len(streamed) <= 2 * len(page)
+        ) or np.array_equal(page, streamed):
+            return
+
+        self._request_window(columns=page)
+
+    def _allocate_buffer(self):
+        """
+        Allocate the sample buffer for the visible columns only. Hidden columns
+        take no space on the GPU.
+
+        Each column owns a ring of `_max_n + 1` slots, followed by a copy of the first
+        slot (to connect the line across the wrap point) and a nan separator. Since a
+        window holds at most `_max_n` samples, at least one slot of the ring is nan and
+        breaks the line where the ring wraps around.
+
+        The rings only hold the samples. The time of each slot is the same for all the
+        columns and is stored once, in `_times`.
+        """
+        self._ring_size = self._stream._max_n + 1
+        self._ring_stride = self._ring_size + 2
+        self._ring_origin = 0  # Index of the sample stored in the first slot
+
+        columns = self._stream.columns
+        n_rings = max(len(columns), 1)  # Buffers can not be empty
+        n_slots = self._ring_stride * n_rings
+
+        # 16 bits samples are uploaded by pairs, hence an even size
+        self._nan = nan_value(self._sample_format)
+        dtype = SAMPLE_DTYPES[self._sample_format]
+        self._samples = np.full(n_slots + n_slots % 2, self._nan, dtype=dtype)
+
+        # Times of the slots, and the same relative to the time origin on the GPU
+        self._slot_times = np.full(self._ring_stride, np.nan)
+        self._times = np.full(self._ring_stride, np.nan, dtype="float32")
+
+        # (columns x slots) view of the samples to fill all the columns at once
+        self._rings = self._samples[:n_slots].reshape(n_rings, self._ring_stride)
+        self._rings = self._rings[: len(columns)]
+
+        self._buffer_slices = {}
+        for c, s in zip(self.data.columns[columns], range(0, n_slots, self._ring_stride)):
+            self._buffer_slices[c] = slice(s, s + self._ring_size + 1)
+
+    def _initialize_graphic(self):
+        """
+        Lines of the visible columns. The positions are computed in the shader from
+        the samples, the shared time axis and per-column tables of scale, offset and color.
+        """
+        n_rings = max(len(self._stream.columns), 1)
+        colors = np.ones((n_rings, 4), dtype=np.float32)
+        colors[: len(self._stream.columns)] = self._colors[self._stream.columns]
+
+        # Small chunks so that panning only uploads the slots that changed
+        self.graphic = Traces(
+            self._samples,
+            self._times,
+            np.zeros((n_rings, 4), dtype=np.float32),
+            colors,
+            TraceMaterial(thickness=1.0),
+            chunk_size=max(self._ring_stride // 64, 64),
         )
+        self._update_channel_table()
+
+    def _update_channel_table(self):
+        """Copy the scale and offset of the visible columns to the lines."""
+        columns = self._stream.columns
+        table = self.graphic.geometry.channels
+        table.data[: len(columns)] = self._manager.row_table(columns)
+        table.update_full()
 
     def _flush(self, slice_: slice = None):
         """
-        Flush the data stream from slice_ argument
+        Flush the data stream from slice_ argument.
+
+        If both the new slice and the slice currently in the buffer are at full resolution,
+        the overlapping samples stay in place in the ring buffers. Only the newly exposed
+        samples are read and written, and only the slots that changed are uploaded.
         """
         if slice_ is None:
             slice_ = self._stream.get_slice(*self.controller.get_xlim())
 
-        time = self.data.t[slice_].astype("float32")
-
-        left_offset = 0
-        right_offset = 0
-        if time.shape[0] < self._stream._max_n:
-            if slice_.start == 0:
-                left_offset = self._stream._max_n - time.shape[0]
-            else:
-                right_offset = time.shape[0] - self._stream._max_n
-
-        # Read
-        data = np.array(self.data.values[slice_, :])
-
-        # Copy the data
-        for i, c in enumerate(self.data.columns):
-            sl = self._buffer_slices[c]
-            sl = slice(sl.start + left_offset, sl.stop + right_offset)
-            self._positions[sl, 0] = time
-            self._positions[sl, 1] = data[:, i]
-            self._positions[sl, 1] *= self._manager.data.loc[c]["scale"]
-            self._positions[sl, 1] += self._manager.data.loc[c]["offset"]
-
-        # Put back some nans on the edges
-        if left_offset:
-            for sl in self._buffer_slices.values():
-                self._positions[sl.start : sl.start + left_offset, 0:2] = np.nan
-        if right_offset:
-            for sl in self._buffer_slices.values():
-                self._positions[sl.stop + right_offset : sl.stop, 0:2] = np.nan
-
-        self.graphic.geometry.positions.set_data(self._positions)
-
-    def _get_min_max(self):
-        """
-        If the data object is a numpy array, get min max directly from it
-        otherwise get min max from the buffer.
-        """
-        if isinstance(self.data.values, np.ndarray) and not isinstance(self.data.values, np.memmap):
-            return np.stack([np.nanmin(self.data, 0), np.nanmax(self.data, 0)]).T
+        current = self._stream.buffer_slice
+        if current == slice_:
+            return
+
+        if (
+            current is not None
+            and (current.step is None or current.step == 1)
+            and (slice_.step is None or slice_.step == 1)
+            and max(current.start, slice_.start) < min(current.stop, slice_.stop)
+        ):
+            overlap_start = max(current.start, slice_.start)
+            overlap_stop = min(current.stop, slice_.stop)
+
+            # Samples that went out of the window
+            runs = []
+            if current.start < overlap_start:
+                runs += self._clear_ring(current.start, overlap_start - current.start)
+            if overlap_stop < current.stop:
+                runs += self._clear_ring(overlap_stop, current.stop - overlap_stop)
+
+            # Newly exposed samples
+            if slice_.start < overlap_start:
+                runs += self._write_buffer(slice(slice_.start, overlap_start), slice_.start)
+            if overlap_stop < slice_.stop:
+                runs += self._write_buffer(slice(overlap_stop, slice_.stop), overlap_stop)
+
+            self._update_wrap_slots()
+            self._upload_runs(runs + [(self._ring_size, self._ring_size + 1)])
         else:
-            return np.array(
-                [
-                    [np.nanmin(self._positions[sl, 1]), np.nanmax(self._positions[sl, 1])]
-                    for sl in self._buffer_slices.values()
-                ]
-            )
+            # Nothing to reuse, the window starts at the first slot
+            self._ring_origin = slice_.start
+            runs = self._write_buffer(slice_, slice_.start)
+            n = sum(b - a for a, b in runs)
+            self._rings[:, n : self._ring_size + 1] = self._nan
+            self.graphic.geometry.samples.update_full()
+            self.graphic.geometry.times.update_full()
+
+        self._stream.buffer_slice = slice_
+
+    def _upload_runs(self, runs: list) -> None:
+        """Upload the runs of slots, given relative to the beginning of a ring, of every ring."""
+        # The time axis is shared by the rings
+        for a, b in runs:
+            self.graphic.geometry.times.update_range(a, b - a)
+        for sl in self._buffer_slices.values():
+            for a, b in runs:
+                self.graphic.update_samples(sl.start + a, sl.start + b)
+
+    def _ring_runs(self, index: int, n: int) -> list:
+        """
+        Contiguous runs of slots, as (start, stop) relative to the beginning of a column ring,
+        holding the `n` samples that follow the data index `index`.
+        """
+        slot = (index - self._ring_origin) % self._ring_size
+        if slot + n <= self._ring_size:
+            return [(slot, slot + n)]
+        return [(slot, self._ring_size), (0, slot + n - self._ring_size)]
+
+    def _write_buffer(self, slice_: slice, index: int) -> list:
+        """
+        Read a slice and write it in each column ring buffer, at the slots of the data index
+        `index`. Returns the runs of slots written.
+        """
+        # Read, either raw samples or a min/max envelope when zoomed out
+        time, data = self._stream.read(slice_)
+        runs = self._ring_runs(index, time.shape[0])
+
+        # Raw samples of all the columns at once, the scale and offset are applied in the shader
+        first = 0
+        for a, b in runs:
+            samples = slice(first, first + b - a)
+            self._slot_times[a:b] = time[samples]
+            self._times[a:b] = time[samples] - self._time_origin
+            self._rings[:, a:b] = data[samples].T
+            first += b - a
+
+        return runs
+
+    def _clear_ring(self, index: int, n: int) -> list:
+        """Put nans in the slots of the `n` samples following the data index `index`."""
+        runs = self._ring_runs(index, n)
+        for a, b in runs:
+            self._rings[:, a:b] = self._nan
+        return runs
+
+    def _update_wrap_slots(self):
+        """
+        Copy the first slot of each ring after the last one, so that the line continues
+        across the wrap point. The copy is nan if the last slot does not hold data.
+        """
+        self._slot_times[self._ring_size] = self._slot_times[0]
+        self._times[self._ring_size] = self._times[0]
+        last = self._ring_values(self._rings[:, self._ring_size - 1])
+        self._rings[:, self._ring_size] = np.where(np.isnan(last), self._nan, self._rings[:, 0])
+
+    def _ring_values(self, samples: np.ndarray) -> np.ndarray:
+        """Samples of the rings as floats, with nan in the slots without data."""
+        values = samples.astype("float64")
+        if self._sample_format == "i16":
+            values[samples == self._nan] = np.nan
+        return values
+
+    def _rebase(self, shift: float) -> None:
+        super()._rebase(shift)
+        # The time axis is shared by the columns, the samples are left untouched
+        self._times[:] = self._slot_times - self._time_origin
+        self.graphic.geometry.times.update_full()
+
+    def _get_min_max(self, start: Optional[float] = None, end: Optional[float] = None):
+        """
+        Minimum and maximum of each column between `start` and `end` (the whole data
+        by default), of shape (n_columns, 2).
+
+        The range is answered by the min/max pyramid of the stream without touching
+        the raw data. Until the pyramid is built, or if the data fits in the buffer,
+        it is computed from the buffer content instead.
+        """
+        start = self.data.t[0] if start is None else start
+        end = self.data.t[-1] if end is None else end
+        minmax = self._stream.get_range(start, end)
+        if minmax is not None:
+            return minmax
+
+        # Hidden columns are not in the buffer
+        minmax = np.full((self.data.shape[1], 2), np.nan)
+        columns = self._stream.columns
+        if len(columns):
+            values = self._ring_values(self._rings[:, : self._ring_size])
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore", category=RuntimeWarning)  # Empty buffer
+                minmax[columns] = np.stack(
+                    [np.nanmin(values, 1), np.nanmax(values, 1)], axis=1
+                )
+        return minmax
+
+    def _get_y_range(self, start: float, end: float) -> Optional[tuple]:
+        """
+        Range of the visible lines between `start` and `end`, in plot coordinates.
+        Only the min/max pyramid is used, so that it can be called on every frame.
+        """
+        columns = self._stream.columns
+        minmax = self._stream.get_range(start, end, exact=False)
+        if minmax is None or not len(columns):
+            return None
+        scale = self._manager.scale[columns, None]
+        offset = self._manager.offset[columns, None]
+        minmax = minmax[columns] * scale + offset
+        return np.nanmin(minmax), np.nanmax(minmax)
 
     def _rescale(self, event):
         """
@@ -559,14 +1103,8 @@ class PlotTsdFrame(_BasePlot):
                     # Update the scale of the PlotManager
                     self._manager.rescale(factor=factor)
 
-                    # Update the current buffers to avoid re-reading from disk
-                    for c, sl in self._buffer_slices.items():
-                        self._positions[sl, 1] += factor * (
-                            self._positions[sl, 1] - self._manager.data.loc[c]["offset"]
-                        )
-
-                    # Update the gpu data
-                    self.graphic.geometry.positions.set_data(self._positions)
+                    # Only the channel table changes, the buffers are not re-read from disk
+                    self._update_channel_table()
                     self.canvas.request_draw(self.animate)
 
     def _reset(self, event):
@@ -576,8 +1114,9 @@ class PlotTsdFrame(_BasePlot):
         if event.type == "key_down":
             if event.key == "r":
                 if isinstance(self.controller, SpanController):
+                    # Only the channel table changes, the buffers stay in place
                     self._manager.reset()
-                    self._flush()
+                    self._update_channel_table()
 
                 if isinstance(self.controller, GetController):
                     self.scene.remove(self.graphic, self.time_point)
@@ -590,26 +1129,29 @@ class PlotTsdFrame(_BasePlot):
                     self._initialize_graphic()
                     self.scene.add(self.graphic)
                     self._manager.reset()
+                    self._update_channel_table()
+                    self._stream.buffer_slice = None
                     self._flush()
 
                 minmax = self._get_min_max()
-                self.controller.set_ylim(np.min(minmax[:, 0]), np.max(minmax[:, 1]))
+                self.controller.set_ylim(np.nanmin(minmax[:, 0]), np.nanmax(minmax[:, 1]))
                 self.canvas.request_draw(self.animate)
 
     def _update(self, action_name):
         """
-        Update function for sort_by and group_by. Because of mode of sort_by, it's not possible
-        to just update the buffer.
+        Update function for sort_by and group_by. Only the channel table is uploaded, the
+        rows that come into view are streamed by `_page_rows`.
         """
         # Update the scale only if one action has been performed
         if self._manager._sorted ^ self._manager._grouped:
-            self._manager.scale = 1 / np.diff(self._get_min_max(), 1).flatten()
+            scale = 1 / np.diff(self._get_min_max(), 1).flatten()
+            # Keep the current scale of the columns without a known range
+            self._manager.scale = np.where(np.isfinite(scale), scale, self._manager.scale)
 
         # Specific to PloTsdFrame, the first row should be at 1.
         self._manager.offset = self._manager.offset + 1 - self._manager.offset.min()
 
-        # Update the buffer
-        self._flush()
+        self._update_channel_table()
 
         # Update camera to fit the full y range
         self.controller.set_ylim(0, np.max(self._manager.offset) + 1)
@@ -664,90 +1206,46 @@ class PlotTsdFrame(_BasePlot):
             self._manager.group_by(values)
             self._update("group_by")
 
-    def color_by(
-        self,
-        metadata_name: str,
-        cmap_name: str = "viridis",
-        vmin: float = 0.0,
-        vmax: float = 100.0,
-    ) -> None:
+    def set_visible(self, visible: dict) -> None:
         """
-        Applies color mapping to plot elements based on a metadata field.
+        Show or hide columns.
 
-        This method retrieves values from the given metadata field and maps them
-        to colors using the specified colormap and value range. The mapped colors
-        are applied to each plot element's material. If color mappings are still
-        being computed in a background thread, the function retries after a short delay.
+        Hidden columns are not read from the data and take no space in the GPU buffer,
+        which is reallocated for the visible columns in view only on the next draws.
 
         Parameters
         ----------
-        metadata_name : str
-            Name of the metadata field used for color mapping.
-        cmap_name : str, default="viridis"
-            Name of the colormap to apply (e.g., "jet", "plasma", "viridis").
-        vmin : float, default=0.0
-            Minimum value for the colormap normalization.
-        vmax : float, default=100.0
-            Maximum value for the colormap normalization.
-
-        Notes
-        -----
-        - If the `color_mapping_thread` is still running, the method defers execution
-          by 25 milliseconds and retries automatically.
-        - If no appropriate color map is found for the metadata, a warning is issued.
-        - Requires `self.data` to support `get_info()` for metadata retrieval.
-        - Triggers a canvas redraw by calling `self.animate()` after updating colors.
-
-        Warnings
-        --------
-        UserWarning
-            Raised when the specified metadata field has no associated color mapping.
+        visible : dict
+            Mapping from column to its visibility.
         """
-        # If the color mapping thread is still processing, retry in 25 milliseconds
-        if self.color_mapping_thread.is_running():
-            slot = lambda: self.color_by(
-                metadata_name, cmap_name=cmap_name, vmin=vmin, vmax=vmax
-            )
-            threading.Timer(0.025, slot).start()
-            return
-
-        # Set the current colormap
-        self.cmap = cmap_name
-
-        # Get the metadata-to-color mapping function for the given metadata field
-        map_to_colors = self.color_mapping_thread.color_maps.get(metadata_name, None)
-
-        # Warn the user if the color map is missing
-        if map_to_colors is None:
-            warnings.warn(
-                message=f"Cannot find appropriate color mapping for {metadata_name} metadata.",
-                category=UserWarning,
-                stacklevel=2,
-            )
+        self._set_manager_visible(visible)
+        if isinstance(self.controller, SpanController):
+            # Hide the rows right away, the columns are paged on the next draw
+            self._update_channel_table()
+        self.canvas.request_draw(self.animate)
 
-        # Prepare keyword arguments for the color mapping function
-        map_kwargs = trim_kwargs(
-            map_to_colors, dict(cmap=colormaps[self.cmap], vmin=vmin, vmax=vmax)
-        )
+    def _reallocate(self):
+        """
+        Reallocate the buffer after a change of the streamed columns or window size.
+        The buffer is left empty, the stream flushes the new window right after.
+        """
+        self._allocate_buffer()
+        self._stream.buffer_slice = None
 
-        # # Get the material objects that will have their colors updated
-        # materials = get_plot_attribute(self, "material")
+        # In x-vs-y mode, the line is rebuilt when switching back to the span controller
+        if isinstance(self.controller, SpanController):
+            self.scene.remove(self.graphic)
+            self._initialize_graphic()
+            self.scene.add(self.graphic)
 
-        # Get the metadata values for each plotted element
-        values = (
-            self.data.get_info(metadata_name) if hasattr(self.data, "get_info") else {}
-        )
+        self.canvas.request_draw(self.animate)
 
-        # If metadata is found and mapping works, update the material colors
-        if len(values):
-            map_color = map_to_colors(values, **map_kwargs)
-            if map_color:
-                for c, sl in self._buffer_slices.items():
-                    self.graphic.geometry.colors.data[sl, :] = map_color[values[c]]
-                    # self.graphic.material.color = map_color[values[c]]
-                self.graphic.geometry.colors.update_full()
-                # Request a redraw of the canvas to reflect the new colors
-                self.canvas.request_draw(self.animate)
+    def _set_colors(self, rgba: np.ndarray) -> None:
+        self._colors[:] = rgba
+        # One color per ring
+        columns = self._stream.columns
+        self.graphic.geometry.colors.data[: len(columns)] = self._colors[columns]
+        self.graphic.geometry.colors.update_full()
 
     def plot_x_vs_y(
         self,
@@ -777,7 +1275,7 @@ class PlotTsdFrame(_BasePlot):
         self.scene.remove(self.graphic)
 
         # Get current time from the center reference line
-        current_time = self.ruler_ref_time.geometry.positions.data[0][0]
+        current_time = self.ruler_ref_time.geometry.positions.data[0][0] + self._time_origin
         self.scene.remove(self.ruler_ref_time)
 
         # Build new geometry for x-y data
@@ -831,20 +1329,37 @@ class PlotTsdFrame(_BasePlot):
         self.canvas.request_draw(self.animate)
 
 
-class PlotTsGroup(_BasePlot):
-    def __init__(self, data: nap.TsGroup, index=None, parent=None):
-        super().__init__(data=data, parent=parent)
+class _BaseRasterPlot(_BasePlot):
+    """
+    Base class of the plots that draw trains of events as ticks, one row per train.
 
-        # Pynaviz specific controller
-        self.controller = SpanController(
-            camera=self.camera,
-            renderer=self.renderer,
-            controller_id=index,
-            dict_sync_funcs=dict_sync_funcs,
-        )
+    Only the events around the view are held in the buffers. They are streamed when
+    panning or zooming, with one `searchsorted` per train. All the trains are drawn as
+    one `Raster`, whose per-train table of offsets, visibility and colors is updated
+    by sorting, grouping, coloring and hiding the trains.
+
+    Zoomed out past `DENSITY_SPIKES_PER_PIXEL`, the raster is replaced by an image of
+    the event counts of each train, about one bin per pixel, read from a spike count
+    pyramid built in the background. Zooming back in shows the events again. The image
+    holds one texture row per visible train, drawn on a quad at the offset of the train.
+
+    Subclasses create a controller with `_stream_spikes` as plot callback, then call
+    `_init_raster`.
+    """
+
+    def _init_raster(self) -> float:
+        """
+        Create the raster and the density image, and stream the events of the first
+        second of the data.
+
+        Returns
+        -------
+        float
+            The start time of the data.
+        """
+        self._trains = spike_trains(self.data)
 
         # Create pygfx objects
-        self.graphic = {}
         spike_sdf = """
         // Normalize coordinates relative to size
         let uv = coord / size;
@@ -853,64 +1368,303 @@ class PlotTsGroup(_BasePlot):
         let dist = abs(uv.x) - line_thickness;
         return dist * size;
         """
-        for i, n in enumerate(data.keys()):
-            positions = np.stack(
-                (data[n].t, np.ones(len(data[n])) * i, np.ones(len(data[n])))
-            ).T
-            positions = positions.astype("float32")
-
-            self.graphic[n] = gfx.Points(
-                gfx.Geometry(positions=positions),
-                gfx.PointsMarkerMaterial(
-                    size=10,
-                    color=GRADED_COLOR_LIST[i % len(GRADED_COLOR_LIST)],
-                    opacity=1,
-                    marker="custom",
-                    custom_sdf=spike_sdf,
-                ),
-            )
+        n_rows = max(len(self._trains), 1)  # Buffers can not be empty
+        colors = np.zeros((n_rows, 4), dtype="float32")
+        for i in range(len(self._trains)):
+            colors[i] = gfx.Color(GRADED_COLOR_LIST[i % len(GRADED_COLOR_LIST)]).rgba
+        self.graphic = Raster(
+            *self._allocate_spikes(1),
+            rows=np.zeros((n_rows, 4), dtype="float32"),
+            colors=colors,
+            material=RasterMaterial(size=10, opacity=1, marker="custom", custom_sdf=spike_sdf),
+        )
 
-        # TODO: properly setup streams
-        # Stream the first batch of data
-        self._buffers = {c: self.graphic[c].geometry.positions for c in self.graphic}
-        self._manager.data["offset"] = self.data.index
-        self._flush()
+        # Density image of the zoomed-out raster, the quads and the image are replaced
+        # when streaming
+        self._max_texture_size = self.renderer.device.limits["max-texture-dimension-2d"]
+        self.density = gfx.Mesh(
+            self._density_quads(np.zeros(0), 1, 1, 1),
+            gfx.MeshBasicMaterial(map=self._density_map(np.zeros((1, 1, 4), dtype="uint8"))),
+            visible=False,
+        )
+        self._density_mode = False
+        self._density_counts = None  # (bin start, bin width, counts) of the window
+        self._pyramid = SpikeCountPyramid(self.data)
+        self._pyramid_ready = False  # Whether the level of detail was picked with it
+        self._pyramid.future.add_done_callback(self._on_pyramid_done)
+
+        # Stream the events of the first second
+        self._spike_window = None  # Time range of the events in the buffers
+        self._spike_slices = [slice(0, 0)] * len(self._trains)
+        self._update_unit_table()
+        start = self.data.time_support.start[0] if len(self.data.time_support) else 0.0
+        self._stream_spikes(position=(start + 0.5, 0, 0), width=1)
 
         # Add elements to the scene for rendering
         self.scene.add(
-            self.ruler_x,
-            self.ruler_y,
-            self.ruler_ref_time,
-            *list(self.graphic.values()),
+            self.ruler_x, self.ruler_y, self.ruler_ref_time, self.density, self.graphic
         )
+        return start
 
-        # Connect specific event handler for TsGroup
-        self.renderer.add_event_handler(self._reset, "key_down")
+    @staticmethod
+    def _allocate_spikes(n: int) -> tuple:
+        """Times and unit indices of `n` spikes."""
+        return np.zeros(max(n, 1), dtype="float32"), np.zeros(max(n, 1), dtype="int32")
 
-        # By default, showing only the first second.
-        self.controller.set_view(0, 1, 0, np.max(self._manager.offset) + 1)
+    def _update_unit_table(self) -> None:
+        """Write the offset and visibility of each unit to the unit table of the raster."""
+        rows = self.graphic.geometry.rows
+        rows.data[: len(self._trains)] = self._manager.row_table()
+        rows.update_full()
+        if self._density_mode:
+            self._draw_density()
 
-        # Request drawing of the scene
-        self.canvas.request_draw(self.animate)
+    def animate(self):
+        """Switch to the density image once the pyramid is built, then draw."""
+        if self._pyramid.is_ready() and not self._pyramid_ready:
+            # Pick the level of detail of the current view again
+            self._pyramid_ready = True
+            self._spike_window = None
+        if self._spike_window is None:
+            self._stream_spikes(position=self.camera.local.position, width=self.camera.width)
+        super().animate()
+
+    def _on_pyramid_done(self, future) -> None:
+        """Draw again once the pyramid is built. Runs on the thread of the pyramid."""
+        self._schedule_draw()
+
+    def _use_density(self, start: float, end: float) -> bool:
+        """True if the view has more than `DENSITY_SPIKES_PER_PIXEL` spikes per unit."""
+        if not self._pyramid.is_ready() or not len(self._trains):
+            return False
+        n_pixels = max(self.canvas.get_logical_size()[0], 1)
+        if (end - start) / n_pixels < self._pyramid.base_bin:
+            # The bins of the pyramid would be wider than a pixel
+            return False
+        n_spikes = 0
+        for t in self._trains:
+            a, b = np.searchsorted(t, (start, end))
+            n_spikes += b - a
+        return n_spikes > DENSITY_SPIKES_PER_PIXEL * n_pixels * len(self._trains)
+
+    def _stream_spikes(self, position: tuple, width: float, **kwargs) -> None:
+        """
+        Stream the spikes around the view, plus `SPIKE_MARGIN` view widths on each side.
 
-    def _flush(self, slice_: slice = None):
+        The spikes are read again when the view leaves the window in the buffers, or
+        when zooming in leaves the window more than twice as wide as needed. The level
+        of detail, spikes or density image, is picked for the new window.
+        """
+        start, end = position[0] - width / 2, position[0] + width / 2
+        margin = SPIKE_MARGIN * width
+        current = self._spike_window
+        if (
+            current is not None
+            and current[0] <= start
+            and end <= current[1]
+            and current[1] - current[0] <= 2 * (end - start + 2 * margin)
+        ):
+            return
+        self._spike_window = (start - margin, end + margin)
+        self._density_mode = self._use_density(start, end)
+        self.graphic.visible = not self._density_mode
+        self.density.visible = self._density_mode
+        self._flush()
+
+    def _flush(self):
+        """
+        Write the spikes of the current window of every unit to the raster buffers.
+        Only the spikes in the window are uploaded and drawn. In density mode, the
+        buffers are emptied and the spike counts of the window are drawn instead.
         """
-        Flush the data stream from slice_ argument
+        start, end = self._spike_window
+        if self._density_mode:
+            # About one bin per pixel of the view, within the size of a texture
+            n_pixels = max(self.canvas.get_logical_size()[0], 1)
+            n_bins = min(int(n_pixels * (1 + 2 * SPIKE_MARGIN)), self._max_texture_size)
+            self._density_counts = self._pyramid.get_counts(start, end, n_bins)
+            self._draw_density()
+            start = end
+        self._spike_slices = [slice(*np.searchsorted(t, (start, end))) for t in self._trains]
+        counts = np.array([sl.stop - sl.start for sl in self._spike_slices], dtype=int)
+        n = int(counts.sum())
+
+        geometry = self.graphic.geometry
+        if n > geometry.times.nitems or geometry.times.nitems > 4 * max(n, 1024):
+            # Room for twice the spikes, to reallocate rarely while panning and zooming
+            times, units = self._allocate_spikes(2 * n)
+            geometry.times = gfx.Buffer(times)
+            geometry.units = gfx.Buffer(units)
+
+        if n:
+            geometry.times.data[:n] = self._window_times() - self._time_origin
+            geometry.units.data[:n] = np.repeat(np.arange(len(counts), dtype="int32"), counts)
+            geometry.times.update_range(0, n)
+            geometry.units.update_range(0, n)
+        geometry.times.draw_range = 0, n
+
+    def _draw_density(self) -> None:
         """
-        # TODO: Handle slice_ argument properly, updating buffers
+        Draw the spike counts of the window as an image with one row per visible unit,
+        on a quad at the offset of the unit. Each unit has its color, with an opacity
+        growing with the square root of the count.
 
-        # if slice_ is None:
-        #    slice_ = self._stream.get_slice(*self.controller.get_xlim())
+        Past `_max_texture_size` units, the rows wrap into blocks of bins side by side,
+        and the bins are merged so that the image fits in a texture.
+        """
+        if self._density_counts is None:
+            return
+        t0, bin_width, counts = self._density_counts
+        visible = np.flatnonzero(self._manager.data["visible"])
+        colors = self.graphic.geometry.colors.data[visible]
+        alpha = np.sqrt(counts[visible] / max(counts.max(initial=0), 1))
+
+        limit = self._max_texture_size
+        n_blocks = max(-(-len(visible) // limit), 1)
+        factor = -(-alpha.shape[1] // (limit // n_blocks))
+        if factor > 1:
+            # Merge the bins, keeping the highest opacity of the merged ones
+            n_bins = -(-alpha.shape[1] // factor)
+            padded = np.zeros((len(visible), n_bins * factor))
+            padded[:, : alpha.shape[1]] = alpha
+            alpha = padded.reshape(len(visible), n_bins, factor).max(2)
+            bin_width = bin_width * factor
+        n_bins = max(alpha.shape[1], 1)
+
+        # Unit i of the visible ones is on row i % limit of block i // limit
+        rows, blocks = np.divmod(np.arange(len(visible)), limit)[::-1]
+        image = np.zeros((max(min(len(visible), limit), 1), n_blocks * n_bins, 4), dtype="uint8")
+        bins = blocks[:, None] * n_bins + np.arange(alpha.shape[1])
+        image[rows[:, None], bins, :3] = colors[:, None, :3] * 255
+        image[rows[:, None], bins, 3] = alpha * colors[:, None, 3] * 255
+
+        # Bin j of a quad spans [bin start + j * bin width, bin start + (j + 1) * bin width]
+        self.density.geometry = self._density_quads(
+            self._manager.offset[visible], n_bins, *image.shape[:2]
+        )
+        self.density.material.map = self._density_map(image)
+        self.density.local.scale_x = bin_width
+        self.density.local.x = t0 - self._time_origin
+
+    @staticmethod
+    def _density_quads(
+        offsets: np.ndarray, n_bins: int, n_rows: int, n_columns: int
+    ) -> gfx.Geometry:
+        """
+        Quads of `n_bins` wide and one unit high centered on `offsets`, textured with the
+        rows of an image of shape (n_rows, n_columns), in the layout of `_draw_density`.
+        """
+        n = len(offsets)
+        rows, blocks = np.divmod(np.arange(n), n_rows)[::-1]
+        positions = np.zeros((4 * max(n, 1), 3), dtype="float32")
+        texcoords = np.zeros((4 * max(n, 1), 2), dtype="float32")
+        positions[: 4 * n, 0] = np.tile([0, n_bins, n_bins, 0], n)
+        positions[: 4 * n, 1] = np.repeat(offsets, 4) + np.tile([-0.5, -0.5, 0.5, 0.5], n)
+        u0, u1 = blocks * n_bins / n_columns, (blocks + 1) * n_bins / n_columns
+        texcoords[: 4 * n, 0] = np.stack([u0, u1, u1, u0], 1).ravel()
+        texcoords[: 4 * n, 1] = np.repeat((rows + 0.5) / n_rows, 4)
+        # Without units, a single empty quad
+        indices = 4 * np.arange(max(n, 1), dtype="int32")[:, None, None] + np.int32(
+            [[0, 1, 2], [0, 2, 3]]
+        )
+        return gfx.Geometry(
+            positions=positions, texcoords=texcoords, indices=indices.reshape(-1, 3)
+        )
 
-        # time = self.data.t[slice_]
-        # n = time.shape[0]
+    @staticmethod
+    def _density_map(image: np.ndarray) -> gfx.TextureMap:
+        """Texture of the density image, one texel per bin."""
+        return gfx.TextureMap(gfx.Texture(image, dim=2), filter="nearest", wrap="clamp")
 
-        for c in self._buffers:
-            # self._buffers[c].data[-n:, 0] = time.astype("float32")
-            self._buffers[c].data[:, 1] = self._manager.data.loc[c]["offset"].astype(
-                "float32"
-            )
-            self._buffers[c].update_full()
+    def _window_times(self) -> np.ndarray:
+        """Times of the spikes in the buffers, unit after unit."""
+        return np.concatenate(
+            [t[sl] for t, sl in zip(self._trains, self._spike_slices)] + [np.empty(0)]
+        )
+
+    def _set_colors(self, rgba: np.ndarray) -> None:
+        table = self.graphic.geometry.colors
+        table.data[: len(rgba)] = rgba
+        table.update_full()
+        if self._density_mode:
+            self._draw_density()
+
+    def set_visible(self, visible: dict) -> None:
+        """
+        Show or hide units. Only the unit table of the raster is uploaded.
+
+        Parameters
+        ----------
+        visible : dict
+            Mapping from unit to its visibility.
+        """
+        self._set_manager_visible(visible)
+        self._update_unit_table()
+        self.canvas.request_draw(self.animate)
+
+    def _rebase(self, shift: float) -> None:
+        super()._rebase(shift)
+        times = self.graphic.geometry.times
+        window = self._window_times()
+        times.data[: len(window)] = window - self._time_origin
+        times.update_range(0, max(len(window), 1))
+        if self._density_counts is not None:
+            self.density.local.x = self._density_counts[0] - self._time_origin
+
+    def close(self):
+        super().close()
+        self._pyramid.shutdown()
+
+
+class PlotTsGroup(_BaseRasterPlot):
+    """
+    A raster plot of the spikes of each unit of a `nap.TsGroup`.
+
+    The spikes around the view are streamed, and zoomed-out views are drawn as a
+    density image of the spike counts (see `_BaseRasterPlot`).
+
+    Parameters
+    ----------
+    data : nap.TsGroup
+        The spike trains to be visualized.
+    index : Optional[int], default=None
+        Unique ID for synchronizing with external controllers.
+    parent : Optional[Any], default=None
+        Optional GUI parent (e.g. QWidget in Qt).
+
+    Attributes
+    ----------
+    controller : SpanController
+        Manages viewport updates, syncing, and linked plot interactions.
+    graphic : Raster
+        The spikes of all the units.
+    density : gfx.Mesh
+        The spike counts of all the units, shown instead of `graphic` when zoomed out.
+    """
+
+    def __init__(self, data: nap.TsGroup, index=None, parent=None):
+        super().__init__(data=data, parent=parent)
+
+        # Pynaviz specific controller
+        self.controller = SpanController(
+            camera=self.camera,
+            renderer=self.renderer,
+            controller_id=index,
+            dict_sync_funcs=dict_sync_funcs,
+            plot_callbacks=[self._stream_spikes],
+        )
+
+        self._manager.data["offset"] = self.data.index
+        start = self._init_raster()
+
+        # Connect specific event handler for TsGroup
+        self.renderer.add_event_handler(self._reset, "key_down")
+
+        # By default, showing only the first second.
+        self.controller.set_view(start, start + 1, 0, np.max(self._manager.offset) + 1)
+
+        # Request drawing of the scene
+        self.canvas.request_draw(self.animate)
 
     def _reset(self, event):
         """
@@ -921,17 +1675,17 @@ class PlotTsGroup(_BasePlot):
                 if isinstance(self.controller, SpanController):
                     self._manager.reset()
                     self._manager.data["offset"] = self.data.index
-                    self._flush()
+                    self._update_unit_table()
 
                 self.controller.set_ylim(0, np.max(self._manager.offset) + 1)
                 self.canvas.request_draw(self.animate)
 
     def _update(self, action_name):
         """
-        Update function for sort_by and group_by. Because of mode of sort_by, it's not possible
-        to just update the buffer.
+        Update function for sort_by and group_by. Only the unit table of the raster is
+        uploaded, the spikes stay in place.
         """
-        self._flush()
+        self._update_unit_table()
 
         # Update camera to fit the full y range
         self.controller.set_ylim(0, np.max(self._manager.offset) + 1)
@@ -989,19 +1743,58 @@ class PlotTsGroup(_BasePlot):
             self._update("group_by")
 
 
-class PlotTs(_BasePlot):
+class PlotTs(_BaseRasterPlot):
+    """
+    A plot of the events of a `nap.Ts` (licks, TTL pulses, camera strobes...) as
+    vertical ticks.
+
+    Only the events around the view are streamed, with a binary search on the
+    timestamps, and zoomed-out views are drawn as a strip of event density, so that the
+    memory used does not grow with the number of events (see `_BaseRasterPlot`).
+
+    Parameters
+    ----------
+    data : nap.Ts
+        The timestamps to be visualized.
+    index : Optional[int], default=None
+        Unique ID for synchronizing with external controllers.
+    parent : Optional[Any], default=None
+        Optional GUI parent (e.g. QWidget in Qt).
+
+    Attributes
+    ----------
+    controller : SpanController
+        Manages viewport updates, syncing, and linked plot interactions.
+    graphic : Raster
+        The ticks of the events.
+    density : gfx.Mesh
+        The event counts, shown instead of `graphic` when zoomed out.
+    """
+
     def __init__(self, data: nap.Ts, index=None, parent=None):
-        super().__init__(parent=parent)
-        self.data = data
+        super().__init__(data=data, parent=parent)
+        self.camera.maintain_aspect = False
 
         # Pynaviz specific controller
-        self.controller = SpanController(
+        self.controller = SpanYLockController(
             camera=self.camera,
             renderer=self.renderer,
             controller_id=index,
             dict_sync_funcs=dict_sync_funcs,
+            plot_callbacks=[self._stream_spikes],
         )
 
+        # A single row of events
+        self._manager = _PlotManager(index=[0])
+        start = self._init_raster()
+        self.ruler_y.ticks = {0: ""}
+
+        # By default, showing only the first second.
+        self.controller.set_view(start, start + 1, -1, 1)
+
+        # Request drawing of the scene
+        self.canvas.request_draw(self.animate)
+
     def sort_by(self, metadata_name: str, mode: Optional[str] = "ascending"):
         pass
 
@@ -1029,8 +1822,8 @@ class PlotIntervalSet(_BasePlot):
     ----------
     controller : SpanController
         Active interactive controller for zooming or selecting.
-    graphic : dict[str, gfx.Mesh] or gfx.Mesh
-        Dictionary of rectangle meshes for each interval.
+    graphic : Intervals
+        The rectangles of all the intervals, drawn as one object.
     """
 
     def __init__(self, data: nap.IntervalSet, index=None, parent=None):
@@ -1046,7 +1839,7 @@ class PlotIntervalSet(_BasePlot):
         )
 
         self.graphic = self._create_and_plot_rectangle(
-            data, color="cyan", transparency=1
+            data, color="cyan", transparency=1, span_view=False
         )
         # set to default position
         self._update()
@@ -1069,22 +1862,39 @@ class PlotIntervalSet(_BasePlot):
                 self._manager.reset()
                 self._update()
 
-    def _update(self, action_name: str = None):
+    def _rebase(self, shift: float) -> None:
+        super()._rebase(shift)
+        self.graphic.set_time_origin(self._time_origin)
+
+    def _set_colors(self, rgba: np.ndarray) -> None:
+        table = self.graphic.geometry.colors
+        table.data[: len(rgba)] = rgba
+        table.update_full()
+
+    def set_visible(self, visible: dict) -> None:
         """
-        Update function for sort_by and group_by
+        Show or hide intervals. Only the per-interval table is uploaded.
+
+        Parameters
+        ----------
+        visible : dict
+            Mapping from interval (row of the IntervalSet) to its visibility.
         """
-        # Grabbing the material object
-        geometries = get_plot_attribute(self, "geometry")  # Dict index -> geometry
+        self._set_manager_visible(visible)
+        self._update_row_table()
+        self.canvas.request_draw(self.animate)
 
-        for c in geometries:
-            geometries[c].positions.data[:2, 1] = self._manager.data.loc[c][
-                "offset"
-            ].astype("float32")
-            geometries[c].positions.data[2:, 1] = (
-                self._manager.data.loc[c]["offset"].astype("float32") + 1
-            )
+    def _update_row_table(self) -> None:
+        """Write the offset and visibility of each interval, each one row high."""
+        rows = self.graphic.geometry.rows
+        rows.data[: len(self.data)] = self._manager.row_table()
+        rows.update_full()
 
-            geometries[c].positions.update_full()
+    def _update(self, action_name: str = None):
+        """
+        Update function for sort_by and group_by. Only the per-interval table is uploaded.
+        """
+        self._update_row_table()
 
         # Update camera to fit the full y range
         ymax = np.max(self._manager.offset) + 1
@@ -130,6 +130,11 @@ class CustomController(ABC, PanZoomController):
 class SpanController(CustomController):
     """
     The class for horizontal time-panning
+
+    When `auto_y` is True, the y range of the camera is fitted to the data after each
+    pan or zoom, using `y_range_func(xmin, xmax)` that returns the (ymin, ymax) of the
+    data in the x range, or None if unknown. It is called on every frame and should
+    answer from a precomputed structure.
     """
 
     def __init__(
@@ -143,6 +148,9 @@ class SpanController(CustomController):
         controller_id: Optional[int] = None,
         dict_sync_funcs: Optional[dict[Callable]] = None,
         plot_callbacks: Optional[dict[Callable]] = None,
+        auto_y: bool = False,
+        y_range_func: Optional[Callable] = None,
+        y_margin: float = 0.05,
     ) -> None:
         super().__init__(
             camera=camera,
@@ -154,6 +162,9 @@ class SpanController(CustomController):
             dict_sync_funcs=dict_sync_funcs,
         )
         self._plot_callbacks = plot_callbacks if plot_callbacks is not None else []
+        self.auto_y = auto_y
+        self.y_range_func = y_range_func
+        self.y_margin = y_margin
 
     def _add_callback(self, func):
         if isinstance(func, Callable):
@@ -162,6 +173,26 @@ class SpanController(CustomController):
     def _update_plots(self):
         for update_func in self._plot_callbacks:
             update_func(**self.camera.get_state())
+        if self.auto_y:
+            self._fit_y()
+
+    def _fit_y(self):
+        """Fit the y range of the camera to the data in the current x range."""
+        if self.y_range_func is None:
+            return
+        # The state the cameras are about to be updated with
+        cam_state = {**self._get_camera_state(), **self._last_cam_state}
+        x, y, z = cam_state["position"]
+        half_width = cam_state["width"] / 2
+        y_range = self.y_range_func(x - half_width, x + half_width)
+        if y_range is None or not np.all(np.isfinite(y_range)):
+            return
+
+        ymin, ymax = y_range
+        margin = self.y_margin * (ymax - ymin) if ymax > ymin else 0.5
+        self._set_camera_state(
+            {"position": (x, (ymin + ymax) / 2, z), "height": ymax - ymin + 2 * margin}
+        )
 
     def _update_pan(self, delta, *, vecx, vecy):
         super()._update_pan(delta, vecx=vecx, vecy=vecy)
@@ -210,6 +241,10 @@ class SpanController(CustomController):
         # Update camera
         self._set_camera_state(state_update)
         self._update_cameras()
+        # Stream the data of the new view, and fit the y range to it
+        self._update_plots()
+        if self.auto_y:
+            self._update_cameras()
         self.renderer_request_draw()
 
 
@@ -238,6 +273,7 @@ class SpanYLockController(SpanController):
         fx = 2 ** delta[0]
         new_cam_state = self._zoom(fx, 1, self._get_camera_state())
         self._set_camera_state(new_cam_state)
+        self._update_plots()
         self._send_sync_event(
             update_type="zoom", cam_state=self._get_camera_state(), delta=delta
         )
@@ -8,30 +8,12 @@ import numpy as np
 import pygfx
 import pynapple as nap
 
+from .intervals import IntervalMaterial, Intervals
 from .utils import GRADED_COLOR_LIST, get_plot_min_max
 
 INTERVAL_PATTERN = re.compile(r"^interval_\d+$")
 
 
-def is_in_view(screen_xmin, screen_xmax, width, rectangle):
-    """Compute if a rectangle is in the field of view.
-
-    Parameters
-    ----------
-    screen_xmin :
-        Lower xlim of the canvas.
-    screen_xmax :
-        Upper xlim of the canvas.
-    width:
-        Rectangle width.
-    rectangle :
-        A rectangle as a pygfx.Mesh.
-    """
-    rect_center_x = rectangle.local.position[0]
-    rect_min, rect_max = rect_center_x - width / 2, rect_center_x + width / 2
-    return (screen_xmin < rect_max) and (screen_xmax > rect_min)
-
-
 def get_max_interval_index(labels):
     return max(
         (
@@ -55,7 +37,7 @@ class IntervalSetInterface:
         if epochs is not None:
             self.add_interval_sets(epochs, labels)
 
-        # map to the rectangle meshes
+        # map to the rectangles of each label
         self._interval_rects = dict()
 
     def add_interval_sets(
@@ -139,72 +121,78 @@ class IntervalSetInterface:
                     if color is None
                     else color
                 )
-                meshes = self._create_and_plot_rectangle(
+                rectangles = self._create_and_plot_rectangle(
                     self._epochs[label], col, transparency
                 )
-                self._interval_rects[label] = meshes
+                self._interval_rects[label] = rectangles
+                self._update_rectangles(rectangles)
                 color_idx += 1
             else:
                 self._update_rectangles(
                     self._interval_rects[label], color, transparency
                 )
 
-    def _update_all_isets(self):
+    def _update_all_isets(self, **kwargs):
+        """Fit the rectangles of every label to the view. Called on every pan and zoom."""
         for rectangles in self._interval_rects.values():
             self._update_rectangles(rectangles)
 
+    @staticmethod
+    def _rebase_rectangles(interval_rects, origin):
+        """Write the times of the rectangles of each label relative to a new time origin."""
+        for rectangles in interval_rects.values():
+            rectangles.set_time_origin(origin)
+
     def _update_rectangles(self, rectangles, color=None, transparency=None):
-        # set to current values if not provided
-        color = (
-            color
-            if color is not None
-            else next(iter(rectangles.values())).material.color
-        )
-        transparency = transparency if transparency is not None else color.a
-
-        xmin, xmax, ymin, ymax = get_plot_min_max(self)
-        new_height = ymax - ymin
-        for rect in rectangles.values():
-            # compute new height
-            position = np.asarray(rect.geometry.positions.data)
-            width, old_height = np.ptp(position[:, :2], axis=0)
-            if (old_height != new_height) and is_in_view(xmin, xmax, width, rect):
-                geom = pygfx.plane_geometry(width, new_height)
-                rect.geometry = geom
-                position = rect.local.position
-                rect.local.position = np.array(
-                    [position[0], ymin + new_height / 2, position[-1]], dtype=np.float32
-                )
+        """
+        Draw only the rectangles in view, and update their color.
 
-            # update color & transparency
+        The rectangles in view are found in the sorted index of the intervals, so that a
+        pan costs O(log n). They span the y range of the view in the shader, so that a
+        y-zoom writes nothing.
+        """
+        colors = rectangles.geometry.colors
+
+        xmin, xmax, _, _ = get_plot_min_max(self)
+        first, last = rectangles.overlapping(xmin, xmax)
+        if rectangles.geometry.intervals.draw_range != (first, last - first):
+            rectangles.geometry.intervals.draw_range = first, last - first
+
+        # set to current values if not provided
+        if color is not None or transparency is not None:
+            color = color if color is not None else pygfx.Color(colors.data[0])
+            transparency = transparency if transparency is not None else color.a
             new_color = pygfx.Color(*pygfx.Color(color).rgb, transparency)
-            if rect.material.color != new_color:
-                rect.material.color = new_color
+            colors.data[:] = new_color.rgba
+            colors.update_full()
+
+    def _create_and_plot_rectangle(self, epoch, color, transparency, span_view=True):
+        """
+        Add the rectangles of the intervals of `epoch` to the scene, as one object.
 
-    def _create_and_plot_rectangle(self, epoch, color, transparency):
-        _, _, ymin, ymax = get_plot_min_max(self)
+        With `span_view`, the rectangles span the y range of the view. Otherwise they are
+        one unit high, at the offset written in their rows.
+        """
         color = pygfx.Color(*pygfx.Color(color).rgb, transparency)
-        height = ymax - ymin
-        mesh_dict = dict()
+        n = max(len(epoch), 1)  # Buffers can not be empty
+
+        rows = np.zeros((n, 4), dtype=np.float32)
+        rows[:, :3] = 1.0, 0.0, 1.0
+        rectangles = Intervals(
+            np.stack((epoch.start, epoch.end), axis=1),
+            getattr(self, "_time_origin", 0.0),
+            rows,
+            np.tile(np.array(color.rgba, dtype=np.float32), (n, 1)),
+            IntervalMaterial(span_view=span_view, pick_write=True),
+        )
         ruler = getattr(self, "ruler_x", None)
         if ruler is not None:
             # plot rect behind ruler.
-            depth = ruler.start_pos[-1] - 1
+            rectangles.local.z = ruler.start_pos[-1] - 1
         else:
             # hardcode a background level.
-            depth = -1001.0
-
-        for i, ep in enumerate(epoch):
-            width = ep.end[0] - ep.start[0]
-            geom = pygfx.plane_geometry(width, height)
-            material = pygfx.MeshBasicMaterial(color=color, pick_write=True)
-            mesh = pygfx.Mesh(geom, material)
-            mesh.local.position = np.array(
-                [ep.start[0] + width / 2, ymin + height / 2, depth], dtype=np.float32
-            )
-            # mesh_dict[ep.start[0], ep.end[0]] = mesh
-            mesh_dict[i] = mesh
+            rectangles.local.z = -1001.0
 
-        self.scene.add(*mesh_dict.values())
+        self.scene.add(rectangles)
         self.canvas.request_draw(self.animate)
-        return mesh_dict
+        return rectangles
@@ -0,0 +1,227 @@
+"""
+Rectangle graphics for the intervals of an IntervalSet.
+
+All the intervals are drawn by one object. The corners of the rectangle of an interval
+are computed in the shader from its start and end times and from per-interval tables of
+y extent and color, so that an IntervalSet is drawn in one draw call whatever its
+number of intervals.
+"""
+
+import numpy as np
+import pygfx as gfx
+import wgpu
+from pygfx.renderers.wgpu import (
+    BaseShader,
+    Binding,
+    RenderMask,
+    register_wgpu_render_function,
+)
+
+
+class IntervalMaterial(gfx.Material):
+    """
+    Material of `Intervals`. The colors come from the per-interval color table.
+
+    Parameters
+    ----------
+    span_view : bool, default=False
+        If True, the rectangles span the y range of the view, computed in the shader
+        from the camera. Their scale and offset are then not used.
+    kwargs :
+        Passed to `gfx.Material`.
+    """
+
+    def __init__(self, span_view: bool = False, **kwargs):
+        super().__init__(**kwargs)
+        self.span_view = span_view
+
+    @property
+    def span_view(self) -> bool:
+        """Whether the rectangles span the y range of the view."""
+        return self._store.span_view
+
+    @span_view.setter
+    def span_view(self, value: bool):
+        self._store.span_view = bool(value)
+
+
+class Intervals(gfx.WorldObject):
+    """
+    Rectangles spanning the intervals of an IntervalSet.
+
+    The rectangle of interval `i` spans `intervals[i]` in x and `[offset, offset + scale]`
+    in y, with the scale and offset of `rows[i]`, or the y range of the view if the
+    material spans the view. Only the intervals in the draw range of
+    the intervals buffer are drawn.
+
+    The intervals are sorted by start, as in a `nap.IntervalSet`, which gives an index
+    of the intervals overlapping a time range in O(log n).
+
+    Parameters
+    ----------
+    times : np.ndarray
+        Float64 array of shape (n_intervals, 2), the start and end of each interval.
+    origin : float
+        Time origin of the scene. The intervals buffer holds the float32 times relative
+        to it.
+    rows : np.ndarray
+        Float32 array of shape (n_intervals, 4) holding the scale, offset and visibility
+        (1 or 0) of each interval in the first three columns, as in
+        `_PlotManager.row_table`.
+    colors : np.ndarray
+        Float32 array of shape (n_intervals, 4), the RGBA color of each interval.
+    material : IntervalMaterial
+        The material.
+    """
+
+    def __init__(self, times, origin, rows, colors, material: IntervalMaterial):
+        self.times = np.asarray(times, dtype=np.float64).reshape(-1, 2)
+        # Sorted index: the starts, and the running maximum of the ends
+        self._starts = np.ascontiguousarray(self.times[:, 0])
+        self._ends = self.times[:, 1].copy()
+        if len(self._ends):
+            np.maximum.accumulate(self._ends, out=self._ends)
+        n = max(self.times.shape[0], 1)  # Buffers can not be empty
+        geometry = gfx.Geometry(
+            intervals=gfx.Buffer(np.zeros((n, 2), dtype=np.float32)),
+            rows=gfx.Buffer(rows),
+            colors=gfx.Buffer(colors),
+        )
+        super().__init__(geometry, material)
+        self.set_time_origin(origin)
+        geometry.intervals.draw_range = 0, self.times.shape[0]
+
+    def set_time_origin(self, origin: float) -> None:
+        """Write the times of the intervals relative to a new time origin."""
+        self.geometry.intervals.data[: self.times.shape[0]] = self.times - origin
+        self.geometry.intervals.update_full()
+
+    def overlapping(self, start: float, end: float) -> tuple[int, int]:
+        """
+        Range of the intervals overlapping a time range, found by binary search.
+
+        Parameters
+        ----------
+        start : float
+            Start of the time range.
+        end : float
+            End of the time range.
+
+        Returns
+        -------
+        tuple[int, int]
+            The first interval overlapping the range, and one past the last one.
+        """
+        first = int(np.searchsorted(self._ends, start, side="right"))
+        last = int(np.searchsorted(self._starts, end, side="left"))
+        return first, max(first, last)
+
+
+@register_wgpu_render_function(Intervals, IntervalMaterial)
+class IntervalShader(BaseShader):
+    """Two triangles per interval, with the corners computed from the interval tables."""
+
+    type = "render"
+
+    def get_bindings(self, wobject, shared):
+        geometry = wobject.geometry
+        material = wobject.material
+
+        rbuffer = "buffer/read_only_storage"
+        bindings = [
+            Binding("u_stdinfo", "buffer/uniform", shared.uniform_buffer),
+            Binding("u_wobject", "buffer/uniform", wobject.uniform_buffer),
+            Binding("u_material", "buffer/uniform", material.uniform_buffer),
+            Binding("s_intervals", rbuffer, geometry.intervals, "VERTEX"),
+            Binding("s_rows", rbuffer, geometry.rows, "VERTEX"),
+            Binding("s_colors", rbuffer, geometry.colors, "VERTEX"),
+        ]
+        self["span_view"] = material.span_view
+
+        bindings = {i: b for i, b in enumerate(bindings)}
+        self.define_bindings(0, bindings)
+        return {0: bindings}
+
+    def get_pipeline_info(self, wobject, shared):
+        return {
+            "primitive_topology": wgpu.PrimitiveTopology.triangle_list,
+            "cull_mode": wgpu.CullMode.none,
+        }
+
+    def get_render_info(self, wobject, shared):
+        # Six vertices per interval
+        offset, size = wobject.geometry.intervals.draw_range
+        render_mask = wobject.render_mask
+        if not render_mask:
+            # The colors have an alpha channel
+            render_mask = RenderMask.all
+            if wobject.material.is_transparent:
+                render_mask = RenderMask.transparent
+        return {"indices": (size * 6, 1, offset * 6, 0), "render_mask": render_mask}
+
+    def get_code(self):
+        return INTERVAL_WGSL
+
+
+INTERVAL_WGSL = """
+{$ include 'pygfx.std.wgsl' $}
+
+struct VertexInput {
+    @builtin(vertex_index) index : u32,
+};
+
+@vertex
+fn vs_main(in: VertexInput) -> Varyings {
+    let index = i32(in.index);
+    let i = index / 6;
+
+    // Corners of the two triangles, in units of the rectangle
+    var corners = array<vec2<f32>, 6>(
+        vec2<f32>(0.0, 0.0),
+        vec2<f32>(1.0, 0.0),
+        vec2<f32>(0.0, 1.0),
+        vec2<f32>(0.0, 1.0),
+        vec2<f32>(1.0, 0.0),
+        vec2<f32>(1.0, 1.0),
+    );
+    var corner = corners[index % 6];
+
+    let interval = load_s_intervals(i);
+    let row = load_s_rows(i);
+    if (row.z == 0.0) {
+        // Hidden interval, drawn as a degenerate triangle
+        corner = vec2<f32>(0.0, 0.0);
+    }
+    let x = mix(interval.x, interval.y, corner.x);
+    $$ if span_view
+    // Bottom and top of the view, from the camera
+    let ndc_to_world = u_stdinfo.cam_transform_inv * u_stdinfo.projection_transform_inv;
+    let bottom = ndc_to_world * vec4<f32>(0.0, -1.0, 0.0, 1.0);
+    let top = ndc_to_world * vec4<f32>(0.0, 1.0, 0.0, 1.0);
+    let y = mix(bottom.y / bottom.w, top.y / top.w, corner.y);
+    $$ else
+    let y = row.y + row.x * corner.y;
+    $$ endif
+
+    let world_pos = u_wobject.world_transform * vec4<f32>(x, y, 0.0, 1.0);
+    let ndc_pos = u_stdinfo.projection_transform * u_stdinfo.cam_transform * world_pos;
+
+    var varyings: Varyings;
+    varyings.position = vec4<f32>(ndc_pos);
+    varyings.world_pos = vec3<f32>(world_pos.xyz / world_pos.w);
+    varyings.color = vec4<f32>(load_s_colors(i));
+    varyings.pick_idx = u32(i);
+    return varyings;
+}
+
+@fragment
+fn fs_main(varyings: Varyings) -> FragmentOutput {
+    let color = varyings.color;
+    var out: FragmentOutput;
+    out.color = vec4<f32>(srgb2physical(color.rgb), color.a * u_material.opacity);
+    $$ if write_pick
+    out.pick = pick_pack(u32(u_wobject.id), 20) + pick_pack(varyings.pick_idx, 26);
+    $$ endif
+    return out;
+}
+"""
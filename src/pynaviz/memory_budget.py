@@ -0,0 +1,107 @@
+"""
+MemoryBudget is used to share a memory budget between the streaming plots.
+"""
+
+from typing import Optional
+
+# Default memory (in bytes) that a streaming plot can use for its buffers
+DEFAULT_MEMORY_BUDGET = 256 * 1024**2
+
+# Bytes used per sample and per channel by a streaming plot: float32 samples on the CPU
+# and on the GPU, plus the samples read from disk. The time axis is shared by the channels.
+BYTES_PER_SAMPLE = 16
+
+# Same for the compact rendering mode: 16 bits samples on the CPU and on the GPU, plus
+# the samples read from disk.
+COMPACT_BYTES_PER_SAMPLE = 12
+
+# Same for a single time series drawn as a line: positions (3 x float32) on the CPU and on
+# the GPU, plus the time and value read from disk.
+TSD_BYTES_PER_SAMPLE = 40
+
+_default_budget = DEFAULT_MEMORY_BUDGET
+
+
+def get_default_memory_budget() -> int:
+    """Return the memory budget (in bytes) of a new streaming plot."""
+    return _default_budget
+
+
+def set_default_memory_budget(nbytes: int) -> None:
+    """
+    Set the memory budget (in bytes) of the streaming plots created from now on, and of
+    the `MemoryBudget` groups created without an explicit total.
+
+    Parameters
+    ----------
+    nbytes : int
+        Memory budget in bytes.
+    """
+    global _default_budget
+    if nbytes <= 0:
+        raise ValueError("`nbytes` must be positive.")
+    _default_budget = int(nbytes)
+
+
+class MemoryBudget:
+    """
+    Splits a total memory budget between a group of streaming plots.
+
+    Plots added with their own budget keep it. The rest of the total is split equally
+    between the other plots. The budgets are updated every time a plot is added or
+    removed, which shrinks or grows the streaming windows.
+
+    Parameters
+    ----------
+    total : Optional[int]
+        Total memory (in bytes) shared by the plots. Defaults to the default memory budget.
+    """
+
+    def __init__(self, total: Optional[int] = None):
+        self.total = get_default_memory_budget() if total is None else int(total)
+        self._plots = dict()
+
+    def __len__(self) -> int:
+        return len(self._plots)
+
+    def __contains__(self, plot) -> bool:
+        return id(plot) in self._plots
+
+    def add(self, plot, nbytes: Optional[int] = None) -> None:
+        """
+        Adds a plot to the group.
+
+        Parameters
+        ----------
+        plot : object
+            A plot with a `set_memory_budget` method. Other plots are ignored.
+        nbytes : Optional[int]
+            Fixed budget of the plot. If None, the plot gets a share of the total.
+        """
+        if not hasattr(plot, "set_memory_budget"):
+            return
+        self._plots[id(plot)] = (plot, nbytes)
+        self._split()
+
+    def remove(self, plot) -> None:
+        """
+        Removes a plot from the group. The other plots get its share.
+
+        Parameters
+        ----------
+        plot : object
+            A plot previously added.
+        """
+        if self._plots.pop(id(plot), None) is not None:
+            self._split()
+
+    def share(self) -> int:
+        """Budget (in bytes) of each plot without a fixed budget."""
+        fixed = [n for _, n in self._plots.values() if n is not None]
+        n_shared = len(self._plots) - len(fixed)
+        return max(self.total - sum(fixed), 0) // max(n_shared, 1)
+
+    def _split(self) -> None:
+        share = self.share()
+        for plot, nbytes in self._plots.values():
+            plot.set_memory_budget(share if nbytes is None else nbytes)
@@ -77,6 +77,31 @@ class _PlotManager:
     def scale(self, values: np.ndarray) -> None:
         self.data["scale"] = values
 
+    def row_table(self, rows: np.ndarray | None = None) -> np.ndarray:
+        """
+        Per-row table uploaded to the GPU, from which the shaders place each row.
+
+        Sorting, grouping or rescaling the rows then only uploads this table, and
+        never the data of the rows.
+
+        Parameters
+        ----------
+        rows : np.ndarray, optional
+            Positions in the index of the rows of the table. Defaults to all the rows.
+
+        Returns
+        -------
+        np.ndarray
+            Float32 array of shape (n_rows, 4) holding the scale, offset and visibility
+            (1 or 0) of each row, and a padding column.
+        """
+        rows = np.arange(len(self.index)) if rows is None else np.asarray(rows, dtype=int)
+        table = np.zeros((len(rows), 4), dtype=np.float32)
+        table[:, 0] = self.scale[rows]
+        table[:, 1] = self.offset[rows]
+        table[:, 2] = self.data["visible"][rows]
+        return table
+
     def sort_by(self, values: dict, mode: str) -> None:
         """
         Updates the offset based on sorted group values. First row should always be at 1.
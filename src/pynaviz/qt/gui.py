@@ -15,6 +15,7 @@ from PyQt6.QtWidgets import (
 )
 
 from pynaviz.controller_group import ControllerGroup
+from pynaviz.memory_budget import MemoryBudget
 from pynaviz.qt.widget_plot import (
     TsdFrameWidget,
     TsdTensorWidget,
@@ -76,7 +77,7 @@ DOCK_LIST_STYLESHEET = """
 
 class ListDock(QDockWidget):
 
-    def __init__(self, pynavar, gui):
+    def __init__(self, pynavar, gui, memory_budget=None):
         super(ListDock, self).__init__()
         self.pynavar = pynavar
         self.gui = gui
@@ -105,6 +106,9 @@ class ListDock(QDockWidget):
         self.ctrl_group = ControllerGroup()
         self._n_dock_open = 0
 
+        # Memory shared by the streaming plots of the open docks
+        self.memory_budget = MemoryBudget(memory_budget)
+
     def add_dock_widget(self, item):
         var = self.pynavar[item.text()]
 
@@ -125,6 +129,8 @@ class ListDock(QDockWidget):
         # Instantiating the dock widget
         dock = QDockWidget()
         dock.setWidget(widget)
+        dock.setAttribute(Qt.WidgetAttribute.WA_DeleteOnClose)
+        dock.destroyed.connect(lambda: self.remove_dock_widget(widget.plot, index))
 
         # Adding the name of the variable to the button container
         layout = widget.button_container.layout()
@@ -152,6 +158,15 @@ class ListDock(QDockWidget):
         self.ctrl_group.add(widget.plot, index)
         self._n_dock_open += 1
 
+        # Streaming plots share the memory budget with the other open plots
+        self.memory_budget.add(widget.plot)
+
+    def remove_dock_widget(self, plot, index):
+        """Release the plot of a closed dock, its memory goes to the other plots."""
+        self.memory_budget.remove(plot)
+        self.ctrl_group.remove(index)
+        plot.close()
+
     def _create_title_bar(self):
         """Create the title bar."""
         self._title_bar = QWidget(self)
@@ -194,7 +209,7 @@ def get_pynapple_variables(variables=None):
     return pynavar
 
 
-def scope(variables):
+def scope(variables, memory_budget=None):
 
     pynavar = get_pynapple_variables(variables)
 
@@ -205,7 +220,7 @@ def scope(variables):
 
     gui = GUI()
 
-    ListDock(pynavar, gui)
+    ListDock(pynavar, gui, memory_budget=memory_budget)
 
     gui.show()
 
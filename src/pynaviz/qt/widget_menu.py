@@ -36,7 +36,6 @@ from PyQt6.QtWidgets import (
 
 from pynaviz.qt.drop_down_dict_builder import get_popup_kwargs
 from pynaviz.qt.qt_item_models import ChannelListModel, DynamicSelectionListView
-from pynaviz.utils import get_plot_attribute
 
 WIDGET_PARAMS = {
     QComboBox: {
@@ -310,10 +309,7 @@ class MenuWidget(QWidget):
     def _request_draw(self) -> None:
         """Request a redraw of the plot when channel states change."""
         widget = self.sender()
-        materials = get_plot_attribute(self.plot, "material")
-        for index, val in getattr(widget, "checks", {}).items():
-            materials[index].opacity = val
-        self.plot.canvas.request_draw(self.plot.animate)
+        self.plot.set_visible(getattr(widget, "checks", {}))
 
     def _make_button(
         self, menu_to_show: Callable, icon_name: str, icon_size: int = 20
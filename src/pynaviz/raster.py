@@ -0,0 +1,116 @@
+"""
+Point graphics for the spikes of many units.
+
+All the spikes are stored in one geometry, as a time and a unit index per spike. The y
+position, visibility and color of the units are read in the shader from small per-unit
+tables, so that the raster is drawn in one draw call whatever the number of units.
+"""
+
+import pygfx as gfx
+from pygfx.renderers.wgpu import (
+    Binding,
+    RenderMask,
+    load_wgsl,
+    register_wgpu_render_function,
+)
+from pygfx.renderers.wgpu.shaders.pointsshader import PointsShader
+
+
+class RasterMaterial(gfx.PointsMarkerMaterial):
+    """Material of `Raster`. The colors come from the per-unit color table."""
+
+    def __init__(self, **kwargs):
+        super().__init__(color_mode="vertex", **kwargs)
+
+
+class Raster(gfx.Points):
+    """
+    Spikes of several units, drawn as one point cloud.
+
+    Spike `i` is drawn at time `times[i]`, on the row of unit `units[i]`. Only the
+    spikes in the draw range of the times buffer are drawn.
+
+    Parameters
+    ----------
+    times : np.ndarray
+        Float32 time of each spike.
+    units : np.ndarray
+        Int32 index of the unit of each spike, of the same size as `times`.
+    rows : np.ndarray
+        Float32 array of shape (n_units, 4) holding the scale, offset and visibility (1
+        or 0) of each unit in the first three columns. The scale is not used by spikes.
+    colors : np.ndarray
+        Float32 array of shape (n_units, 4), the RGBA color of each unit.
+    material : RasterMaterial
+        The points material.
+    """
+
+    def __init__(self, times, units, rows, colors, material: RasterMaterial):
+        geometry = gfx.Geometry(
+            times=gfx.Buffer(times),
+            units=gfx.Buffer(units),
+            rows=gfx.Buffer(rows),
+            colors=gfx.Buffer(colors),
+        )
+        super().__init__(geometry, material)
+
+
+@register_wgpu_render_function(Raster, RasterMaterial)
+class RasterShader(PointsShader):
+    """The pygfx points shader, with positions and colors computed from the raster buffers."""
+
+    def get_bindings(self, wobject, shared):
+        geometry = wobject.geometry
+        material = wobject.material
+
+        rbuffer = "buffer/read_only_storage"
+        bindings = [
+            Binding("u_stdinfo", "buffer/uniform", shared.uniform_buffer),
+            Binding("u_wobject", "buffer/uniform", wobject.uniform_buffer),
+            Binding("u_material", "buffer/uniform", material.uniform_buffer),
+            Binding("s_times", rbuffer, geometry.times, "VERTEX"),
+            Binding("s_units", rbuffer, geometry.units, "VERTEX"),
+            Binding("s_rows", rbuffer, geometry.rows, "VERTEX"),
+            Binding("s_colors", rbuffer, geometry.colors, "VERTEX"),
+        ]
+        self["shape"] = material.marker
+        self["custom_sdf"] = material.custom_sdf or (
+            "return max(abs(coord.x), abs(coord.y)) - size * 0.5;"
+        )
+
+        bindings = {i: b for i, b in enumerate(bindings)}
+        self.define_bindings(0, bindings)
+        return {0: bindings}
+
+    def get_render_info(self, wobject, shared):
+        # Six vertices per spike, as in the points shader
+        offset, size = wobject.geometry.times.draw_range
+        render_mask = wobject.render_mask
+        if not render_mask:
+            # The colors have an alpha channel
+            render_mask = RenderMask.all
+            if wobject.material.is_transparent:
+                render_mask = RenderMask.transparent
+        return {"indices": (size * 6, 1, offset * 6, 0), "render_mask": render_mask}
+
+    def get_code(self):
+        code = load_wgsl("points.wgsl")
+        code = code.replace("load_s_positions(", "load_raster_position(")
+        code = code.replace("load_s_colors(", "load_raster_color(")
+        return code + RASTER_WGSL
+
+
+RASTER_WGSL = """
+fn load_raster_position(i: i32) -> vec3<f32> {
+    let row = load_s_rows(load_s_units(i));
+    if (row.z == 0.0) {
+        // Hidden unit, drawn as a degenerate quad
+        return vec3<f32>(bitcast<f32>(0x7fc00000u), 0.0, 0.0);
+    }
+    return vec3<f32>(load_s_times(i), row.y, 1.0);
+}
+
+fn load_raster_color(i: i32) -> vec4<f32> {
+    return load_s_colors(load_s_units(i));
+}
+"""
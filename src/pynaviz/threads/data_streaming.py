@@ -1,50 +1,376 @@
-from typing import Callable
+import concurrent.futures
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Optional
 
+import numpy as np
 import pynapple as nap
 
+from .min_max_pyramid import MinMaxPyramid
+
+
+def n_columns(data) -> int:
+    """Number of columns of a `nap.TsdFrame`. A `nap.Tsd` is a single column."""
+    return data.shape[1] if len(data.shape) > 1 else 1
+
+
+def read_values(data, slice_: slice, columns=slice(None)) -> np.ndarray:
+    """
+    Read the values of the rows `slice_` of a `nap.TsdFrame` or a `nap.Tsd`.
+
+    Returns
+    -------
+    np.ndarray
+        Values of shape (n_rows, n_columns), with a single column for a `nap.Tsd`.
+    """
+    if len(data.shape) == 1:
+        return np.array(data.values[slice_])[:, None][:, columns]
+    return np.array(data.values[slice_, columns])
+
+
+class PrefetchCache:
+    """
+    A bounded cache of contiguous blocks of a `nap.TsdFrame` (or a `nap.Tsd`), filled by a
+    background thread.
+
+    Blocks are read at full resolution and evicted in least-recently-used order once the
+    total number of cached samples exceeds `max_samples`.
+
+    Attributes
+    ----------
+    data : nap.TsdFrame or nap.Tsd
+        The time series data to read from.
+    max_samples : int
+        Maximum number of samples (rows) kept in the cache.
+    blocks : OrderedDict
+        Cached blocks, keys are (start, stop) indices and values are (time, values) arrays.
+    columns : np.ndarray or slice
+        Columns read from the data.
+    """
+
+    def __init__(self, data: nap.TsdFrame, max_samples: int, columns=slice(None)):
+        self.data = data
+        self.max_samples = max_samples
+        self.columns = columns
+        self.blocks = OrderedDict()
+        self._lock = threading.Lock()
+        self.worker = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+        self.future = None
+        self._pending = None
+
+    def is_running(self) -> bool:
+        return self.future is not None and not self.future.done()
+
+    def covered_until(self, start: int) -> int:
+        """Return the first index after `start` that is not in the cache."""
+        with self._lock:
+            ranges = sorted(self.blocks.keys())
+        for a, b in ranges:
+            if a <= start < b:
+                start = b
+        return start
+
+    def covered_from(self, stop: int) -> int:
+        """Return the first index before `stop` from which everything is in the cache."""
+        with self._lock:
+            ranges = sorted(self.blocks.keys(), reverse=True)
+        for a, b in ranges:
+            if a < stop <= b:
+                stop = a
+        return stop
+
+    def submit(self, start: int, stop: int) -> None:
+        """Read [start, stop) in the background, unless a read is already running."""
+        if start >= stop or self.is_running():
+            return
+        self._pending = (start, stop)
+        self.future = self.worker.submit(self._read, start, stop, self.columns)
+
+    def fill(self, start: int, stop: int, cancelled: Callable[[], bool]) -> bool:
+        """
+        Read the parts of [start, stop) that are not cached, in the calling thread.
+
+        The samples are read in blocks of 1/8 of the cache size, and the read stops
+        between two blocks as soon as `cancelled()` returns True.
+
+        Returns
+        -------
+        bool
+            False if the read was cancelled before the end.
+        """
+        if self.is_running():
+            # Don't read the samples being prefetched twice
+            self.future.result()
+
+        block = max(self.max_samples // 8, 1024)
+        position = self.covered_until(start)
+        while position < stop:
+            if cancelled():
+                return False
+            end = min(position + block, stop)
+            self._read(position, end, self.columns)
+            position = self.covered_until(end)
+        return True
+
+    def _read(self, start: int, stop: int, columns) -> None:
+        slice_ = slice(start, stop)
+        self.put(start, stop, (self.data.t[slice_], read_values(self.data, slice_, columns)), columns)
+
+    def put(self, start: int, stop: int, block: tuple, columns) -> None:
+        """Store the timestamps and values of [start, stop), read for `columns`."""
+        with self._lock:
+            if columns is not self.columns:
+                # The columns changed during the read
+                return
+            self.blocks[(start, stop)] = block
+            n_samples = sum(b - a for a, b in self.blocks)
+            while n_samples > self.max_samples and len(self.blocks) > 1:
+                (a, b), _ = self.blocks.popitem(last=False)
+                n_samples -= b - a
+
+    def get(self, start: int, stop: int) -> Optional[tuple[np.ndarray, np.ndarray]]:
+        """
+        Return the timestamps and values of [start, stop) if the cache holds all of it.
+
+        If the missing part is being read in the background, wait for it instead of
+        reading the same samples twice.
+        """
+        pending = self._pending
+        if (
+            self.is_running()
+            and pending is not None
+            and pending[0] < stop
+            and start < pending[1]
+        ):
+            self.future.result()
+
+        with self._lock:
+            pieces = []
+            position = start
+            for a, b in sorted(self.blocks.keys()):
+                if a <= position < b:
+                    self.blocks.move_to_end((a, b))
+                    t, v = self.blocks[(a, b)]
+                    end = min(b, stop)
+                    pieces.append((t[position - a : end - a], v[position - a : end - a]))
+                    position = end
+                if position >= stop:
+                    break
+        if position < stop or not pieces:
+            return None
+        if len(pieces) == 1:
+            return pieces[0]
+        return (
+            np.concatenate([p[0] for p in pieces]),
+            np.concatenate([p[1] for p in pieces]),
+        )
+
+    def clear(self, columns=slice(None)) -> None:
+        """Drop every block and read `columns` from now on."""
+        with self._lock:
+            self.columns = columns
+            self.blocks.clear()
+            # Don't wait for a read of the previous columns, it is dropped once done
+            self._pending = None
+
+    def shutdown(self) -> None:
+        self.worker.shutdown(wait=False, cancel_futures=True)
+
 
 class TsdFrameStreaming:
     """
     A class for streaming fixed-size windows of a `nap.TsdFrame` to a callback function,
-    based on a desired position and zoom level.
+    based on a desired position and zoom level. A `nap.Tsd` is streamed as a single column.
 
     This is useful for building interactive, time-based visualizations where the window
     content is updated as the user pans or zooms over time.
 
     Attributes
     ----------
-    data : nap.TsdFrame
+    data : nap.TsdFrame or nap.Tsd
         The time series data to stream.
     _callback : Callable
         A function that receives a slice object indicating the time window to display.
     window_size : float
         The size of the time window (in same units as TsdFrame timestamps).
     _max_n : int
-        Number of data points in the base window (determined by `window_size`).
+        Number of data points in the base window (determined by `window_size` or given
+        directly).
+    _pyramid : MinMaxPyramid or None
+        Min/max pyramid used to decimate the data when zoomed out and to answer
+        y-range queries.
+    buffer_slice : slice or None
+        Slice of the data currently held by the display buffer. It is set by the owner
+        of the buffer after each flush, and None when the buffer content is invalid.
+    velocity : float
+        Smoothed panning velocity of the view center (time units per second).
+    _cache : PrefetchCache
+        Blocks read ahead of the buffer in the panning direction, or for the window
+        requested with `request`.
+    columns : np.ndarray
+        Indices of the columns that are read, in increasing order.
+    on_ready : Callable or None
+        Called from a background thread when a window requested with `request` is ready
+        to be flushed with `apply`.
+    on_layout : Callable or None
+        Called by `apply` when the columns or the window size requested with `request`
+        take effect, before the window is flushed.
     """
 
-    def __init__(self, data: nap.TsdFrame, callback: Callable[[slice], None], window_size: float):
+    def __init__(
+        self,
+        data: nap.TsdFrame,
+        callback: Callable[[slice], None],
+        window_size: Optional[float] = None,
+        envelope: bool = True,
+        prefetch: bool = True,
+        lookahead: float = 0.5,
+        max_n: Optional[int] = None,
+        on_ready: Optional[Callable[[], None]] = None,
+        on_layout: Optional[Callable[[], None]] = None,
+    ):
         """
         Initialize the TsdFrameStreaming object.
 
         Parameters
         ----------
-        data : nap.TsdFrame
+        data : nap.TsdFrame or nap.Tsd
             The input time series data to stream.
         callback : Callable[[slice], None]
             A function to be called with the computed slice when streaming.
-        window_size : float
+        window_size : float, optional
             The time duration (in same units as data timestamps) of the streaming window.
+            Ignored if `max_n` is given.
+        envelope : bool, default=True
+            If True, zoomed out windows are decimated with a min/max envelope computed
+            from a pyramid built in the background. Otherwise, a strided slice is used
+            and y-range queries are not available.
+        prefetch : bool, default=True
+            If True, the samples ahead of the buffer in the panning direction are read
+            in a background thread.
+        lookahead : float, default=0.5
+            Duration (in seconds of wall-clock time) of panning at the current velocity
+            that is read ahead.
+        max_n : int, optional
+            Number of data points in the streaming window.
+        on_ready : Callable[[], None], optional
+            Called from a background thread when a window requested with `request` has
+            been read, typically to flag a draw that calls `apply`. It should not use the
+            canvas, which belongs to the GUI thread.
+        on_layout : Callable[[], None], optional
+            Called by `apply` when the columns or the window size requested with
+            `request` take effect, typically to reallocate the buffers. The window is
+            flushed right after.
         """
         self.data = data
         self._callback = callback
-        self.window_size = window_size
+        self.columns = np.arange(n_columns(data))
+
+        if max_n is None:
+            if window_size is None:
+                raise ValueError("Either `window_size` or `max_n` must be provided.")
+            # Determine how many points fall in a window of size `window_size`
+            slice_ = data._get_slice(data.t[0], data.t[0] + window_size)
+            max_n = slice_.stop - slice_.start
+        self._max_n = max(min(int(max_n), data.shape[0]), 1)
+        self.window_size = self._max_n / data.rate
+
+        # Also answers the y-range queries, even if the data fits in a single window
+        if envelope:
+            self._pyramid = MinMaxPyramid(data)
+            if data.shape[0] <= self._max_n:
+                # Not bigger than the buffer, no need to wait for it in the background
+                self._pyramid.wait_until_done()
+        else:
+            self._pyramid = None
 
-        # Determine how many points fall in a window of size `window_size`
-        slice_ = data._get_slice(0, window_size)
-        self._max_n = slice_.stop - slice_.start
+        self.buffer_slice = None
 
-    def get_slice(self, start: float, end: float) -> slice:
+        # Read ahead when panning at full resolution
+        self.velocity = 0.0
+        self.lookahead = lookahead
+        self._last_position = None
+        self._prefetch = prefetch
+        self._cache = PrefetchCache(data, max_samples=self._max_n)
+
+        # Windows requested asynchronously. Only the newest request is read, and it is
+        # flushed by `apply` once ready.
+        self.on_ready = on_ready
+        self.on_layout = on_layout
+        self._layout = None  # Columns and window size requested, until applied
+        self._request_lock = threading.Lock()
+        self._request = None  # Newest request not picked by the worker yet
+        self._servicing = False
+        self._ready = None  # Window read in the background, waiting for `apply`
+        self._prepared = None  # Decimated window read in the background
+        self._generation = 0  # Incremented when the columns or the window size change
+        self._worker = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+
+    def resize(self, max_n: int) -> None:
+        """
+        Change the number of data points of the streaming window.
+
+        The buffer content is invalidated and the prefetched blocks are dropped.
+
+        Parameters
+        ----------
+        max_n : int
+            New number of data points in the streaming window.
+        """
+        self._set_layout(self.columns, self._clip_max_n(max_n))
+
+    def _clip_max_n(self, max_n: int) -> int:
+        return max(min(int(max_n), self.data.shape[0]), 1)
+
+    def _set_layout(self, columns: np.ndarray, max_n: int) -> None:
+        """Stream `columns` with windows of `max_n` data points from now on."""
+        self._layout = None
+        self.columns = columns
+        self._max_n = max_n
+        self.window_size = self._max_n / self.data.rate
+        self.buffer_slice = None
+        self._invalidate_requests()
+        self._cache.max_samples = self._max_n
+        self._cache.clear(self._column_index())
+
+    def _invalidate_requests(self) -> None:
+        """Drop the windows read in the background for the previous columns or size."""
+        self._generation += 1
+        self._ready = None
+        self._prepared = None
+
+    def _column_index(self, columns=None):
+        """Index of the streamed columns, a plain slice when all of them are streamed."""
+        columns = self.columns if columns is None else columns
+        if len(columns) == n_columns(self.data):
+            return slice(None)
+        return columns
+
+    @property
+    def next_columns(self) -> np.ndarray:
+        """Columns streamed once the pending request is applied."""
+        layout = self._layout
+        return self.columns if layout is None else layout[0]
+
+    @property
+    def next_max_n(self) -> int:
+        """Window size once the pending request is applied."""
+        layout = self._layout
+        return self._max_n if layout is None else layout[1]
+
+    def set_columns(self, columns) -> None:
+        """
+        Set the columns to read. Cached blocks of the previous columns are dropped.
+
+        Parameters
+        ----------
+        columns : array-like of int
+            Indices of the columns to read.
+        """
+        self._set_layout(np.unique(np.asarray(columns, dtype=int)), self._max_n)
+
+    def get_slice(self, start: float, end: float, max_n: Optional[int] = None) -> slice:
         """
         Compute a slice centered around the requested window, extended to match internal resolution.
 
@@ -54,6 +380,8 @@ class TsdFrameStreaming:
             Start time of the requested display window.
         end : float
             End time of the requested display window.
+        max_n : int, optional
+            Number of data points in the window. Defaults to `_max_n`.
 
         Returns
         -------
@@ -62,14 +390,168 @@ class TsdFrameStreaming:
         """
         width = end - start
 
-        slice_ = self.data._get_slice(
-            start - width,
-            end + width,
-            n_points=int(self._max_n)
-        )
+        max_n = self._max_n if max_n is None else max_n
+        slice_ = self.data._get_slice(start - width, end + width)
+
+        # Decimate so that the slice covers the whole window with at most `max_n` points
+        n = slice_.stop - slice_.start
+        if n > max_n:
+            slice_ = slice(slice_.start, slice_.stop, -(-n // max_n))
 
         return slice_
 
+    def get_full_resolution_slice(
+        self, start: float, end: float, max_n: Optional[int] = None
+    ) -> slice:
+        """
+        Compute a full-resolution slice of at most `max_n` points covering a window.
+
+        If the current buffer already holds the window at full resolution, its slice is
+        returned unchanged. Otherwise, the slice is centered on the window.
+
+        Parameters
+        ----------
+        start : float
+            Start time of the requested display window.
+        end : float
+            End time of the requested display window.
+        max_n : int, optional
+            Number of data points in the window. Defaults to `_max_n`.
+
+        Returns
+        -------
+        slice
+            A contiguous slice object.
+        """
+        max_n = self._max_n if max_n is None else max_n
+        view = self.data._get_slice(start, end)
+        current = self.buffer_slice
+        if (
+            current is not None
+            and (current.step is None or current.step == 1)
+            and current.start <= view.start
+            and view.stop <= current.stop
+            and current.stop - current.start <= max_n
+        ):
+            return current
+
+        n = self.data.shape[0]
+        center = (view.start + view.stop) // 2
+        first = min(max(center - max_n // 2, 0), max(n - max_n, 0))
+        return slice(first, min(first + max_n, n))
+
+    def read(self, slice_: slice) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Read the timestamps and values of a slice.
+
+        When the slice is strided (zoomed out) and the min/max pyramid can serve it,
+        the values are the min/max envelope of the slice instead of a strided read,
+        so that no extreme is lost.
+
+        Parameters
+        ----------
+        slice_ : slice
+            A slice as returned by `get_slice`.
+
+        Returns
+        -------
+        time : np.ndarray
+            Timestamps, of shape (n,) with n <= `_max_n`.
+        values : np.ndarray
+            Values of the streamed columns, of shape (n, len(columns)).
+        """
+        if slice_.step is not None and slice_.step > 1:
+            prepared = self._prepared
+            if prepared is not None and prepared[0] == slice_ and prepared[2] is None:
+                return prepared[1]
+            return self._read_decimated(slice_)
+
+        cached = self._cache.get(slice_.start, slice_.stop)
+        if cached is not None:
+            return cached
+        return self.data.t[slice_], read_values(self.data, slice_, self._column_index())
+
+    def _read_decimated(
+        self, slice_: slice, columns=None, max_n: Optional[int] = None
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Read a strided slice, from the min/max envelope when available."""
+        columns = self._column_index(columns)
+        max_n = self._max_n if max_n is None else max_n
+        if self._pyramid is not None:
+            envelope = self._pyramid.get_envelope(slice_.start, slice_.stop, max_n)
+            if envelope is not None:
+                return envelope[0], envelope[1][:, columns]
+        return self.data.t[slice_], read_values(self.data, slice_, columns)
+
+    def get_range(self, start: float, end: float, exact: bool = True) -> Optional[np.ndarray]:
+        """
+        Minimum and maximum of each column between two times, from the min/max pyramid.
+
+        Parameters
+        ----------
+        start : float
+            Start time of the window.
+        end : float
+            End time of the window (included).
+        exact : bool, default=True
+            If False, the window is rounded to the bins of the pyramid and the raw data
+            is never read. Otherwise up to ``2 * (base_bin - 1)`` raw rows are read
+            synchronously at the edges of the window, see `MinMaxPyramid.get_range`.
+            Use False when called on every frame.
+
+        Returns
+        -------
+        np.ndarray or None
+            Array of shape (n_columns, 2) with the minimum and maximum of every column
+            of the data. None if the pyramid is not available yet.
+        """
+        if self._pyramid is None:
+            return None
+        slice_ = self.data.get_slice(start, end)
+        minmax = self._pyramid.get_range(slice_.start, slice_.stop, exact=exact)
+        if minmax is None:
+            return None
+        return minmax.T.astype("float64")
+
+    def _update_velocity(self, center: float) -> None:
+        """Update the smoothed panning velocity from the new view center."""
+        now = time.monotonic()
+        if self._last_position is not None:
+            last_time, last_center = self._last_position
+            dt = now - last_time
+            if dt > 1.0:
+                # The user stopped panning in between
+                self.velocity = 0.0
+            elif dt > 0:
+                self.velocity = 0.5 * self.velocity + 0.5 * (center - last_center) / dt
+        self._last_position = (now, center)
+
+    def prefetch(self) -> None:
+        """
+        Read the samples ahead of the current buffer in the panning direction.
+
+        The number of samples read is the distance covered in `lookahead` seconds at
+        the current velocity, bounded between 1/16 of a window and a full window.
+        """
+        current = self.buffer_slice
+        if (
+            not self._prefetch
+            or current is None
+            or (current.step is not None and current.step > 1)
+            or self.velocity == 0
+        ):
+            return
+
+        n_ahead = abs(self.velocity) * self.lookahead * self.data.rate
+        n_ahead = int(np.clip(n_ahead, self._max_n // 16, self._max_n))
+        if self.velocity > 0:
+            start = self._cache.covered_until(current.stop)
+            stop = min(current.stop + n_ahead, self.data.shape[0])
+        else:
+            start = max(current.start - n_ahead, 0)
+            stop = self._cache.covered_from(current.start)
+        self._cache.submit(start, stop)
+
     def stream(self, position: tuple, width: float, **kwargs) -> None:
         """
         Stream a slice of data to the callback based on the current position and zoom level.
@@ -83,24 +565,201 @@ class TsdFrameStreaming:
         **kwargs :
             Additional arguments passed to the callback (not used in this base class).
         """
-        slice_ = self.get_slice(position[0] - width / 2, position[0] + width / 2)
-
-        # print(position[0] - width / 2, position[0] + width / 2)
-        # print(slice_, slice_.stop - slice_.start, self._max_n, "\n")
-
-        # Edge cases
-        if slice_.start == 0 or slice_.stop == self.data.shape[0]:
-            self._callback(slice_)
+        start, end = position[0] - width / 2, position[0] + width / 2
+        self._update_velocity(position[0])
+        self._callback(self._select_slice(start, end))
+        self.prefetch()
 
+    def _select_slice(self, start: float, end: float, max_n: Optional[int] = None) -> slice:
+        """Slice of the data to stream for a display window."""
+        max_n = self._max_n if max_n is None else max_n
+        slice_ = self.get_slice(start, end, max_n)
         if slice_.step is not None and slice_.step > 1:
             # Zooming out — reduced resolution
-            self._callback(slice_)
-        elif (slice_.step is None or slice_.step == 1) and (slice_.stop - slice_.start) == self._max_n:
+            return slice_
+        elif (slice_.stop - slice_.start) == max_n:
             # Panning — full-resolution window
-            self._callback(slice_)
+            return slice_
         else:
-            # Zooming in — resolution higher than base window, currently ignored
-            pass
+            # Zooming in — resolution higher than base window, or edges of the data
+            return self.get_full_resolution_slice(start, end, max_n)
+
+    def request(
+        self,
+        position: tuple,
+        width: float,
+        columns=None,
+        max_n: Optional[int] = None,
+        **kwargs,
+    ) -> None:
+        """
+        Request a window asynchronously, based on the current position and zoom level.
+
+        The samples are read in a background thread and the callback is only called by
+        `apply`, so that the current buffer stays on screen in the meantime. Requests
+        are coalesced: a new request supersedes the ones that are not done yet, and the
+        read of a superseded window stops at the next block.
+
+        A request can also change the streamed columns or the window size. The change
+        takes effect in `apply`, once the window of the new columns has been read, and
+        holds for the following requests.
+
+        Parameters
+        ----------
+        position : float
+            Center time position of the requested view window.
+        width : float
+            Width of the requested view window.
+        columns : array-like of int, optional
+            Indices of the columns to stream. Defaults to `next_columns`.
+        max_n : int, optional
+            Number of data points in the streaming window. Defaults to `next_max_n`.
+        **kwargs :
+            Additional arguments (not used).
+        """
+        start, end = position[0] - width / 2, position[0] + width / 2
+        self._update_velocity(position[0])
+
+        if columns is not None or max_n is not None:
+            columns = (
+                self.next_columns
+                if columns is None
+                else np.unique(np.asarray(columns, dtype=int))
+            )
+            max_n = self.next_max_n if max_n is None else self._clip_max_n(max_n)
+            if np.array_equal(columns, self.columns) and max_n == self._max_n:
+                # Back to the current columns and size
+                self._layout = None
+            else:
+                self._layout = (columns, max_n)
+        layout = self._layout
+        slice_ = self._select_slice(start, end, None if layout is None else layout[1])
+
+        with self._request_lock:
+            if layout is None and slice_ == self.buffer_slice:
+                # Back to the window on screen, nothing to read
+                self._request = None
+                self._ready = None
+                return
+            self._request = (slice_, self._generation, layout)
+            if not self._servicing:
+                self._servicing = True
+                self._worker.submit(self._service)
+
+    def _service(self) -> None:
+        """Read the newest requested window until there is no more request."""
+        try:
+            while True:
+                with self._request_lock:
+                    request = self._request
+                    self._request = None
+                    if request is None:
+                        self._servicing = False
+                        return
+                slice_, generation, layout = request
+                if self._prepare(slice_, generation, layout):
+                    self._ready = request
+                    if self.on_ready is not None:
+                        self.on_ready()
+        except BaseException:
+            with self._request_lock:
+                self._servicing = False
+            raise
+
+    def _superseded(self, generation: int) -> bool:
+        return self._request is not None or generation != self._generation
+
+    def _prepare(self, slice_: slice, generation: int, layout: Optional[tuple]) -> bool:
+        """
+        Read a requested window in the background. Full-resolution samples go to the
+        cache, decimated windows are kept until the next `apply`. The window of new
+        columns or of a new size is kept until the next `apply` as well.
+
+        Returns
+        -------
+        bool
+            False if the request was superseded.
+        """
+        if layout is not None:
+            columns, max_n = layout
+            if slice_.step is not None and slice_.step > 1:
+                window = self._read_decimated(slice_, columns, max_n)
+            else:
+                window = (
+                    self.data.t[slice_],
+                    read_values(self.data, slice_, self._column_index(columns)),
+                )
+            if self._superseded(generation):
+                return False
+            self._prepared = (slice_, window, layout)
+            return True
+
+        if slice_.step is not None and slice_.step > 1:
+            prepared = self._read_decimated(slice_)
+            if self._superseded(generation):
+                return False
+            self._prepared = (slice_, prepared, None)
+            return True
+
+        # Only the samples that are not in the buffer yet
+        current = self.buffer_slice
+        pieces = [(slice_.start, slice_.stop)]
+        if current is not None and (current.step is None or current.step == 1):
+            pieces = [
+                (slice_.start, min(slice_.stop, current.start)),
+                (max(slice_.start, current.stop), slice_.stop),
+            ]
+        for a, b in pieces:
+            if a < b and not self._cache.fill(a, b, lambda: self._superseded(generation)):
+                return False
+        return not self._superseded(generation)
+
+    def apply(self) -> bool:
+        """
+        Flush the window read in the background, if any. It should be called from the
+        thread that draws the buffer, e.g. before rendering.
+
+        Returns
+        -------
+        bool
+            True if a window was flushed.
+        """
+        ready = self._ready
+        if ready is None:
+            return False
+        self._ready = None
+        slice_, generation, layout = ready
+        if generation != self._generation:
+            return False
+
+        if layout is not None:
+            prepared = self._prepared
+            if layout is not self._layout or prepared is None or prepared[2] is not layout:
+                # Superseded by another change of columns or size
+                return False
+            self._set_layout(*layout)
+            window = prepared[1]
+            if slice_.step is not None and slice_.step > 1:
+                self._prepared = (slice_, window, None)
+            else:
+                self._cache.put(slice_.start, slice_.stop, window, self._cache.columns)
+            if self.on_layout is not None:
+                self.on_layout()
+
+        self._callback(slice_)
+        prepared = self._prepared
+        if prepared is not None and prepared[0] == slice_:
+            self._prepared = None
+        self.prefetch()
+        return True
+
+    def close(self) -> None:
+        """Stop the background threads."""
+        self._request = None
+        self._worker.shutdown(wait=False, cancel_futures=True)
+        if self._pyramid is not None:
+            self._pyramid.shutdown()
+        self._cache.shutdown()
 
     def __len__(self) -> int:
         """
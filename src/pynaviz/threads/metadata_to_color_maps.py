@@ -10,14 +10,14 @@ from matplotlib.colors import Colormap
 from numpy.typing import NDArray
 
 
-def map_numeric_arrays(
+def numeric_array_lut(
     values: NDArray | pd.Series,
     vmin: float = 0.0,
     vmax: float = 100.0,
     cmap: Colormap = colormaps["rainbow"],
 ):
     """
-    Map numerical array to colors.
+    Color lookup table of a numerical array.
 
     Parameters
     ----------
@@ -33,8 +33,8 @@ def map_numeric_arrays(
     Returns
     -------
     :
-        A dictionary containing the color maps, keys are metadata entries, values are colors.
-
+        The sorted unique values after clipping, the float32 RGBA color of each unique
+        value of shape (n_unique, 4), and the index of each value in the table.
     """
     # truncate between percentiles
     values = np.clip(
@@ -42,9 +42,85 @@ def map_numeric_arrays(
         np.nanpercentile(values, vmin, method="closest_observation"),
         np.nanpercentile(values, vmax, method="closest_observation"),
     )
-    unq_vals = np.unique(values)
-    col_val = np.linspace(0, 1, unq_vals.shape[0])
-    return {v: pygfx.Color(cmap(c)) for v, c in zip(unq_vals, col_val)}
+    unq_vals, index = np.unique(values, return_inverse=True)
+    lut = cmap(np.linspace(0, 1, unq_vals.shape[0]))
+    return unq_vals, np.asarray(lut, dtype=np.float32), index.ravel()
+
+
+def non_color_string_array_lut(values, cmap=colormaps["rainbow"]):
+    """
+    Color lookup table of a string/categorical array.
+
+    Parameters
+    ----------
+    values:
+        A categorical or string-like array or pandas Series.
+    cmap:
+        A colormap.
+
+    Returns
+    -------
+    :
+        The unique values in order of first appearance, the float32 RGBA color of each
+        unique value of shape (n_unique, 4), and the index of each value in the table.
+    """
+    unq_vals, first, index = np.unique(values, return_index=True, return_inverse=True)
+    # keep the ordering of the metadata array
+    order = np.argsort(first)
+    rank = np.empty_like(order)
+    rank[order] = np.arange(order.shape[0])
+    lut = cmap(np.linspace(0, 1, unq_vals.shape[0]))
+    return unq_vals[order], np.asarray(lut, dtype=np.float32), rank[index.ravel()]
+
+
+def color_array_lut(values):
+    """
+    Color lookup table of an array of color strings.
+
+    Parameters
+    ----------
+    values:
+        Array of strings with valid pygfx named colors.
+
+    Returns
+    -------
+    :
+        The sorted unique values, the float32 RGBA color of each unique value of shape
+        (n_unique, 4), and the index of each value in the table.
+    """
+    unq_vals, index = np.unique(values, return_inverse=True)
+    lut = np.array([pygfx.Color(v).rgba for v in unq_vals], dtype=np.float32)
+    return unq_vals, lut.reshape(-1, 4), index.ravel()
+
+
+def map_numeric_arrays(
+    values: NDArray | pd.Series,
+    vmin: float = 0.0,
+    vmax: float = 100.0,
+    cmap: Colormap = colormaps["rainbow"],
+):
+    """
+    Map numerical array to colors.
+
+    Parameters
+    ----------
+    values:
+        A numeric one dimensional array or pandas series.
+    vmin:
+        Min percentile, between 0 and 100.
+    vmax:
+        Max percentile, between 0 and 100.
+    cmap:
+        A colormap.
+
+    Returns
+    -------
+    :
+        A dictionary containing the color maps, keys are metadata entries, values are colors.
+
+    """
+    unq_vals, lut, _ = numeric_array_lut(values, vmin=vmin, vmax=vmax, cmap=cmap)
+    return {v: pygfx.Color(c) for v, c in zip(unq_vals, lut, strict=True)}
 
 
 def map_non_color_string_array(values, cmap=colormaps["rainbow"]):
@@ -64,11 +140,8 @@ def map_non_color_string_array(values, cmap=colormaps["rainbow"]):
         A dictionary containing the color maps, keys are metadata entries, values are colors.
 
     """
-    unq_vals, index = np.unique(values, return_index=True)
-    # keep the ordering of the metadata array
-    unq_vals = unq_vals[np.argsort(index)]
-    col_val = np.linspace(0, 1, unq_vals.shape[0])
-    return {v: pygfx.Color(cmap(c)) for v, c in zip(unq_vals, col_val)}
+    unq_vals, lut, _ = non_color_string_array_lut(values, cmap=cmap)
+    return {v: pygfx.Color(c) for v, c in zip(unq_vals, lut, strict=True)}
 
 
 def map_color_array(values):
@@ -85,7 +158,38 @@ def map_color_array(values):
     :
         A dictionary containing the color maps, keys are metadata entries, values are colors.
     """
-    return {v: pygfx.Color(v) for v in np.unique(values)}
+    unq_vals, lut, _ = color_array_lut(values)
+    return {v: pygfx.Color(c) for v, c in zip(unq_vals, lut, strict=True)}
+
+
+# Lookup table of each color mapping
+COLOR_LUTS = {
+    map_numeric_arrays: numeric_array_lut,
+    map_non_color_string_array: non_color_string_array_lut,
+    map_color_array: color_array_lut,
+}
+
+
+def map_to_rgba(map_to_colors, values, **kwargs) -> NDArray:
+    """
+    Vectorized color mapping: value -> index -> RGBA lookup table.
+
+    Parameters
+    ----------
+    map_to_colors:
+        One of the mapping functions of `COLOR_LUTS`.
+    values:
+        The metadata values.
+    kwargs:
+        Passed to the lookup table function, as to `map_to_colors`.
+
+    Returns
+    -------
+    :
+        Float32 array of shape (n_values, 4), the RGBA color of each value.
+    """
+    _, lut, index = COLOR_LUTS[map_to_colors](values, **kwargs)
+    return lut[index]
 
 
 def is_mappable_color(vals):
@@ -0,0 +1,321 @@
+"""
+Multi-resolution min/max (envelope) pyramid for `nap.TsdFrame` and `nap.Tsd` data.
+
+Each level stores, for every channel, the minimum and maximum of consecutive bins
+of samples. Decimating through the pyramid keeps every extreme of the signal, unlike
+a strided slice that aliases fast events (spikes, artifacts) away when zoomed out.
+"""
+
+import concurrent.futures
+import threading
+from typing import Optional
+
+import numpy as np
+import pynapple as nap
+
+
+def reduce_min_max(values: np.ndarray, bin_size: int) -> np.ndarray:
+    """
+    Reduce consecutive bins of samples to their min and max.
+
+    Parameters
+    ----------
+    values : np.ndarray
+        Array of shape (n_samples, n_channels) of raw samples, or of shape
+        (n_samples, 2, n_channels) of already reduced (min, max) pairs.
+    bin_size : int
+        Number of consecutive entries merged in one bin. The last bin can be partial.
+
+    Returns
+    -------
+    np.ndarray
+        Array of shape (ceil(n_samples / bin_size), 2, n_channels) with the minimum
+        in [:, 0] and the maximum in [:, 1]. NaNs are ignored unless a bin is all NaN.
+    """
+    if values.ndim == 2:
+        values = np.stack((values, values), axis=1)
+
+    n_full = values.shape[0] // bin_size
+    n_bins = -(-values.shape[0] // bin_size)
+    out = np.empty((n_bins, 2) + values.shape[2:], dtype=values.dtype)
+
+    if n_full:
+        full = values[: n_full * bin_size].reshape((n_full, bin_size) + values.shape[1:])
+        np.fmin.reduce(full[:, :, 0], axis=1, out=out[:n_full, 0])
+        np.fmax.reduce(full[:, :, 1], axis=1, out=out[:n_full, 1])
+    if n_bins > n_full:
+        tail = values[n_full * bin_size :]
+        out[-1, 0] = np.fmin.reduce(tail[:, 0], axis=0)
+        out[-1, 1] = np.fmax.reduce(tail[:, 1], axis=0)
+    return out
+
+
+class MinMaxPyramid:
+    """
+    Per-channel min/max pyramid of a `nap.TsdFrame`, built once in a background thread.
+
+    Level ``k`` merges ``base_bin * factor**k`` consecutive samples into one (min, max)
+    pair per channel. The finest bins are widened so that the finest level holds at most
+    `max_values` values, whatever the length of the recording. Levels are stored in the
+    dtype of the data, so the whole pyramid costs at most about
+    ``max_values * itemsize * factor / (factor - 1)`` bytes.
+
+    Attributes
+    ----------
+    data : nap.TsdFrame or nap.Tsd
+        The time series the pyramid is computed from.
+    base_bin : int
+        Number of samples per bin at the finest level, after the cap on its size.
+    factor : int
+        Bin size ratio between two consecutive levels.
+    levels : list of np.ndarray
+        Available levels, each of shape (n_bins, 2, n_channels). Levels are appended
+        from the finest to the coarsest as the background build progresses.
+    """
+
+    def __init__(
+        self,
+        data: nap.TsdFrame,
+        base_bin: int = 16,
+        factor: int = 4,
+        chunk_size: int = 2**22,
+        max_values: int = 2**23,
+    ):
+        """
+        Initialize the pyramid and start building it in the background.
+
+        Parameters
+        ----------
+        data : nap.TsdFrame or nap.Tsd
+            The time series to summarize.
+        base_bin : int, default=16
+            Minimum number of samples per bin at the finest level.
+        factor : int, default=4
+            Bin size ratio between two consecutive levels.
+        chunk_size : int, default=2**22
+            Approximate number of values (samples x channels) read from disk at once.
+        max_values : int, default=2**23
+            Maximum number of values (bins x 2 x channels) of the finest level.
+        """
+        self.data = data
+        self.factor = int(factor)
+        self.levels = []
+
+        # Widen the finest bins until the finest level fits in `max_values`
+        n_values = 2 * data.shape[0] * max(int(np.prod(data.shape[1:])), 1)
+        self.base_bin = max(int(base_bin), -(-n_values // max(int(max_values), 1)))
+
+        # Rows read at once, as a multiple of the finest bin size
+        n_rows = max(chunk_size // max(int(np.prod(data.shape[1:])), 1), 1)
+        self._chunk_rows = max(n_rows // self.base_bin, 1) * self.base_bin
+
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self.worker = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+        self.future = self.worker.submit(self._build)
+
+    def bin_size(self, level: int) -> int:
+        """Number of samples per bin at a given level."""
+        return self.base_bin * self.factor**level
+
+    def is_ready(self) -> bool:
+        """True when every level has been computed."""
+        return self.future.done()
+
+    def wait_until_done(self, timeout: Optional[float] = None) -> None:
+        """Block until the background build completes."""
+        try:
+            self.future.result(timeout=timeout)
+        except concurrent.futures.TimeoutError:
+            pass
+
+    def shutdown(self) -> None:
+        """Stop the background build and release the worker."""
+        self._stop_event.set()
+        self.worker.shutdown(wait=False)
+
+    def _build(self) -> None:
+        n_samples = self.data.shape[0]
+
+        if not n_samples:
+            return
+
+        # Finest level straight from the raw data, chunk by chunk. The chunks are
+        # multiples of the bin size, so each one fills its own bins of the level.
+        n_bins = -(-n_samples // self.base_bin)
+        n_channels = int(np.prod(self.data.shape[1:]))
+        level = np.empty((n_bins, 2, n_channels), dtype=self.data.values.dtype)
+        for start in range(0, n_samples, self._chunk_rows):
+            if self._stop_event.is_set():
+                return
+            stop = min(start + self._chunk_rows, n_samples)
+            values = np.asarray(self.data.values[start:stop])
+            first = start // self.base_bin
+            level[first : first + -(-(stop - start) // self.base_bin)] = reduce_min_max(
+                values.reshape(values.shape[0], -1), self.base_bin
+            )
+        with self._lock:
+            self.levels.append(level)
+
+        # Coarser levels from the previous one
+        while level.shape[0] > 1:
+            if self._stop_event.is_set():
+                return
+            level = reduce_min_max(level, self.factor)
+            with self._lock:
+                self.levels.append(level)
+
+    def select_level(self, bin_size: int) -> Optional[int]:
+        """
+        Return the coarsest available level whose bins are not larger than `bin_size`.
+
+        Parameters
+        ----------
+        bin_size : int
+            The number of samples that should be merged in one output bin.
+
+        Returns
+        -------
+        int or None
+            The level index, or None if no level is fine enough or none is available.
+        """
+        with self._lock:
+            n_levels = len(self.levels)
+        selected = None
+        for level in range(n_levels):
+            if self.bin_size(level) <= bin_size:
+                selected = level
+        return selected
+
+    def get_envelope(self, start: int, stop: int, max_points: int):
+        """
+        Min/max envelope of the samples in [start, stop) with at most `max_points` points.
+
+        Parameters
+        ----------
+        start : int
+            Index of the first sample.
+        stop : int
+            Index after the last sample.
+        max_points : int
+            Maximum number of output points. Each output bin yields two points
+            (the minimum then the maximum), both placed at the bin start time.
+
+        Returns
+        -------
+        tuple of np.ndarray or None
+            Timestamps of shape (n_points,) and interleaved min/max values of shape
+            (n_points, n_channels). None if the required level is not built yet.
+        """
+        # One bin is kept in reserve for the alignment of `start` on the bin grid
+        n_out_bins = max(max_points // 2 - 1, 1)
+        bin_size = max(-(-(stop - start) // n_out_bins), 1)
+
+        level = self.select_level(bin_size)
+        if level is None and bin_size >= self.base_bin:
+            # The pyramid is still being built, reading the raw data would be too slow
+            return None
+
+        if level is None:
+            # Finer than the first level: reduce raw data, reading one chunk at a time
+            rows = max(self._chunk_rows // bin_size, 1) * bin_size
+            parts = []
+            for s in range(start, stop, rows):
+                values = np.asarray(self.data.values[s : min(s + rows, stop)])
+                parts.append(reduce_min_max(values.reshape(values.shape[0], -1), bin_size))
+            envelope = np.concatenate(parts)
+            first = start
+        else:
+            # Merge groups of bins of the selected level to reach the requested bin size
+            level_bin = self.bin_size(level)
+            group = -(-bin_size // level_bin)
+            bin_size = group * level_bin
+            first_bin = (start // bin_size) * group
+            last_bin = -(-stop // level_bin)
+            with self._lock:
+                envelope = self.levels[level][first_bin:last_bin]
+            envelope = reduce_min_max(envelope, group)
+            first = first_bin * level_bin
+
+        time = self.data.t[first : first + envelope.shape[0] * bin_size : bin_size]
+        time = np.repeat(time, 2)
+        values = envelope.reshape(envelope.shape[0] * 2, -1)
+        return time, values
+
+    def get_range(self, start: int, stop: int, exact: bool = True) -> Optional[np.ndarray]:
+        """
+        Per-channel minimum and maximum of the samples in [start, stop).
+
+        The range is split into whole bins taken from the coarsest levels that fit,
+        plus at most ``2 * (base_bin - 1)`` raw samples at the edges, so that the cost
+        grows with the logarithm of the range length.
+
+        With `exact`, the edges are read synchronously from the raw data: up to
+        ``2 * (base_bin - 1)`` rows of every channel per call. Since `base_bin` grows
+        with the recording to cap the pyramid size, this can be tens of thousands of
+        rows for long recordings with many channels. Callers on the render path (the
+        y-range fit of the span controller) use ``exact=False``, which only reads the
+        levels and costs ``O(factor * n_levels)`` bins.
+
+        Parameters
+        ----------
+        start : int
+            Index of the first sample.
+        stop : int
+            Index after the last sample.
+        exact : bool, default=True
+            If False, the edges are covered by the bins of the finest level that contain
+            them instead of raw samples, so that the raw data is never read. The range
+            is then extended by less than `base_bin` samples on each side.
+
+        Returns
+        -------
+        np.ndarray or None
+            Array of shape (2, n_channels) with the minimum in [0] and the maximum in [1].
+            None if no level is built yet or if the range is empty.
+        """
+        with self._lock:
+            levels = list(self.levels)
+        if not levels:
+            return None
+
+        start, stop = max(start, 0), min(stop, self.data.shape[0])
+        parts = []
+
+        if exact:
+            # Raw samples that don't fill a bin of the finest level
+            lo = -(-start // self.base_bin) * self.base_bin
+            hi = (stop // self.base_bin) * self.base_bin
+            if lo >= hi:
+                lo = hi = stop
+            for a, b in ((start, lo), (hi, stop)):
+                if a < b:
+                    values = np.asarray(self.data.values[a:b])
+                    parts.append(reduce_min_max(values.reshape(b - a, -1), b - a))
+        else:
+            # Bins of the finest level around the range, the last one can be partial
+            lo = (start // self.base_bin) * self.base_bin
+            hi = -(-stop // self.base_bin) * self.base_bin if start < stop else lo
+
+        # Whole bins, going up the levels while the next level has whole bins inside
+        for level, values in enumerate(levels):
+            if lo >= hi:
+                break
+            size = self.bin_size(level)
+            if level + 1 < len(levels):
+                next_size = size * self.factor
+                next_lo = -(-lo // next_size) * next_size
+                next_hi = (hi // next_size) * next_size
+                if next_lo < next_hi:
+                    parts.append(values[lo // size : next_lo // size])
+                    parts.append(values[next_hi // size : hi // size])
+                    lo, hi = next_lo, next_hi
+                    continue
+            parts.append(values[lo // size : hi // size])
+            break
+
+        parts = [p for p in parts if p.shape[0]]
+        if not parts:
+            return None
+        merged = np.concatenate(parts)
+        return np.stack((np.fmin.reduce(merged[:, 0], 0), np.fmax.reduce(merged[:, 1], 0)))
@@ -0,0 +1,185 @@
+"""
+Multi-resolution spike count pyramid for `nap.TsGroup` and `nap.Ts` data.
+
+Each level stores, for every unit, the number of spikes in consecutive time bins. A
+zoomed-out raster is then drawn as a (units x bins) density image read from the
+pyramid, instead of one marker per spike.
+"""
+
+import concurrent.futures
+import threading
+from typing import Optional
+
+import numpy as np
+import pynapple as nap
+
+
+def spike_trains(data) -> list:
+    """Timestamps of each unit of a `nap.TsGroup`, or of a `nap.Ts` as a single unit."""
+    if isinstance(data, nap.TsGroup):
+        return [data[c].t for c in data.keys()]
+    return [data.t]
+
+
+def reduce_counts(counts: np.ndarray, bin_size: int) -> np.ndarray:
+    """
+    Sum consecutive bins of spike counts.
+
+    Parameters
+    ----------
+    counts : np.ndarray
+        Array of shape (n_units, n_bins) of spike counts.
+    bin_size : int
+        Number of consecutive bins merged in one bin. The last bin can be partial.
+
+    Returns
+    -------
+    np.ndarray
+        Array of shape (n_units, ceil(n_bins / bin_size)) of spike counts.
+    """
+    n_units, n_bins = counts.shape
+    n_out = -(-n_bins // bin_size)
+    padded = np.zeros((n_units, n_out * bin_size), dtype=counts.dtype)
+    padded[:, :n_bins] = counts
+    return padded.reshape(n_units, n_out, bin_size).sum(axis=2, dtype=counts.dtype)
+
+
+class SpikeCountPyramid:
+    """
+    Per-unit spike count pyramid of a `nap.TsGroup` or a `nap.Ts`, built once in a
+    background thread.
+
+    The finest level splits the time support of the group into bins of `base_bin`
+    seconds, with at most `max_counts` counts for all the units together. Level ``k``
+    has bins of ``base_bin * factor**k`` seconds. The whole pyramid costs about
+    ``4 * max_counts * factor / (factor - 1)`` bytes.
+
+    Attributes
+    ----------
+    data : nap.TsGroup or nap.Ts
+        The spike trains the pyramid is computed from.
+    start : float
+        Time of the start of the first bin.
+    base_bin : float
+        Width in seconds of the bins of the finest level.
+    factor : int
+        Bin size ratio between two consecutive levels.
+    levels : list of np.ndarray
+        Available levels, each of shape (n_units, n_bins). Levels are appended from the
+        finest to the coarsest as the background build progresses.
+    """
+
+    def __init__(self, data, max_counts: int = 2**23, factor: int = 4):
+        """
+        Initialize the pyramid and start building it in the background.
+
+        Parameters
+        ----------
+        data : nap.TsGroup or nap.Ts
+            The spike trains to summarize.
+        max_counts : int, default=2**23
+            Maximum number of counts (units x bins) of the finest level.
+        factor : int, default=4
+            Bin size ratio between two consecutive levels.
+        """
+        self.data = data
+        self.factor = int(factor)
+        self.levels = []
+        self._trains = spike_trains(data)
+
+        support = data.time_support
+        self.start = float(support.start[0]) if len(support) else 0.0
+        duration = float(support.end[-1]) - self.start if len(support) else 0.0
+        self._n_bins = max(int(max_counts) // max(len(self._trains), 1), 1)
+        self.base_bin = duration / self._n_bins if duration > 0 else 1.0
+
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self.worker = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+        self.future = self.worker.submit(self._build)
+
+    def bin_width(self, level: int) -> float:
+        """Width in seconds of the bins of a given level."""
+        return self.base_bin * self.factor**level
+
+    def is_ready(self) -> bool:
+        """True when every level has been computed."""
+        return self.future.done()
+
+    def wait_until_done(self, timeout: Optional[float] = None) -> None:
+        """Block until the background build completes."""
+        try:
+            self.future.result(timeout=timeout)
+        except concurrent.futures.TimeoutError:
+            pass
+
+    def shutdown(self) -> None:
+        """Stop the background build and release the worker."""
+        self._stop_event.set()
+        self.worker.shutdown(wait=False)
+
+    def _build(self) -> None:
+        # Finest level, one unit at a time
+        level = np.zeros((len(self._trains), self._n_bins), dtype=np.uint32)
+        for i, t in enumerate(self._trains):
+            if self._stop_event.is_set():
+                return
+            index = ((t - self.start) / self.base_bin).astype(np.int64)
+            np.clip(index, 0, self._n_bins - 1, out=index)
+            level[i] = np.bincount(index, minlength=self._n_bins)
+        with self._lock:
+            self.levels.append(level)
+
+        # Coarser levels from the previous one
+        while level.shape[1] > 1:
+            if self._stop_event.is_set():
+                return
+            level = reduce_counts(level, self.factor)
+            with self._lock:
+                self.levels.append(level)
+
+    def get_counts(self, start: float, end: float, max_bins: int):
+        """
+        Spike counts of every unit between two times, in at most about `max_bins` bins.
+
+        The bins are taken from the coarsest level that is fine enough, and merged by
+        groups to get close to `max_bins` bins. They are aligned on the bins of the
+        pyramid, so the returned range can extend by less than a bin on each side.
+
+        Parameters
+        ----------
+        start : float
+            Start time.
+        end : float
+            End time.
+        max_bins : int
+            Number of bins wanted between `start` and `end`.
+
+        Returns
+        -------
+        tuple or None
+            The start time of the first bin, the bin width in seconds and the counts of
+            shape (n_units, n_bins). None if the pyramid is not built yet, or if its
+            finest bins are wider than requested.
+        """
+        with self._lock:
+            levels = list(self.levels)
+        if not levels:
+            return None
+
+        width = (end - start) / max(int(max_bins), 1)
+        selected = None
+        for level in range(len(levels)):
+            if self.bin_width(level) <= width:
+                selected = level
+        if selected is None:
+            return None
+
+        level_bin = self.bin_width(selected)
+        group = max(int(width // level_bin), 1)
+        counts = levels[selected]
+        first = max(int((start - self.start) // (level_bin * group)) * group, 0)
+        last = int(np.ceil((end - self.start) / (level_bin * group))) * group
+        last = min(last, counts.shape[1])
+        counts = reduce_counts(counts[:, first : max(last, first)], group)
+        return self.start + first * level_bin, level_bin * group, counts
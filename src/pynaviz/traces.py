@@ -0,0 +1,208 @@
+"""
+Line graphics for many channels sharing one time axis.
+
+The samples of every channel are stored alone (float32, or a compact 16 bits format) and
+the positions of the line nodes are computed in the shader, from a time buffer shared
+by all the channels and a per-channel table of scale, offset and color.
+"""
+
+import warnings
+
+import numpy as np
+import pygfx as gfx
+from pygfx.renderers.wgpu import (
+    Binding,
+    RenderMask,
+    load_wgsl,
+    register_wgpu_render_function,
+)
+from pygfx.renderers.wgpu.shaders.lineshader import LineShader
+from pygfx.utils import array_from_shadertype
+
+# Value of an int16 sample that breaks the line, like nan does for floats. A genuine
+# -32768 sample of int16 data is therefore drawn as a gap.
+INT16_NAN = np.iinfo(np.int16).min
+
+SAMPLE_DTYPES = {"f32": np.float32, "i16": np.int16, "f16": np.float16}
+
+
+def sample_format(dtype: np.dtype) -> str:
+    """
+    Compact sample format for data of a given dtype: "i16" for integers that fit in an
+    int16, "f16" for floats.
+
+    Other integers (uint16, 32 and 64 bits) can not be stored exactly in 16 bits: float16
+    rounds them above 2048 and overflows above 65504. They keep the "f32" format, with
+    a warning.
+
+    Note that a genuine -32768 sample of int16 data is drawn as a gap, since it is the
+    value that breaks the lines in the "i16" format.
+    """
+    dtype = np.dtype(dtype)
+    if dtype.kind == "i" and dtype.itemsize <= 2 or dtype.kind == "u" and dtype.itemsize == 1:
+        return "i16"
+    if dtype.kind in "iu":
+        warnings.warn(
+            message=f"{dtype} samples can not be stored exactly in 16 bits, "
+            "using float32 samples instead.",
+            category=UserWarning,
+            stacklevel=3,
+        )
+        return "f32"
+    return "f16"
+
+
+def nan_value(fmt: str):
+    """Sample value that breaks the line in a given sample format."""
+    return INT16_NAN if fmt == "i16" else np.nan
+
+
+class TraceMaterial(gfx.LineMaterial):
+    """Material of `Traces`. The colors come from the per-channel color table."""
+
+    def __init__(self, **kwargs):
+        super().__init__(color_mode="vertex", **kwargs)
+
+
+class Traces(gfx.Line):
+    """
+    Lines of several channels that share the same time axis.
+
+    The nodes of channel `c` are the slots `c * stride` to `(c + 1) * stride` of the
+    samples buffer, and slot `s` of every channel is drawn at `times[s]`.
+
+    Parameters
+    ----------
+    samples : np.ndarray
+        Flat array of float32, int16 or float16 samples, of size `n_channels * stride`.
+        16 bits samples are packed by pairs, hence an even size.
+    times : np.ndarray
+        Float32 time of each slot, of size `stride`.
+    channels : np.ndarray
+        Float32 array of shape (n_channels, 4) holding the scale and offset of each
+        channel in the first two columns, as in `_PlotManager.row_table`. The y position
+        of a node is `sample * scale + offset`.
+    colors : np.ndarray
+        Float32 array of shape (n_channels, 4), the RGBA color of each channel.
+    material : TraceMaterial
+        The line material.
+    chunk_size : int, optional
+        Chunk size (in items) of the samples and times buffers.
+    """
+
+    def __init__(
+        self,
+        samples: np.ndarray,
+        times: np.ndarray,
+        channels: np.ndarray,
+        colors: np.ndarray,
+        material: TraceMaterial,
+        chunk_size: int = None,
+    ):
+        formats = {dtype: fmt for fmt, dtype in SAMPLE_DTYPES.items()}
+        self.sample_format = formats[samples.dtype.type]
+        self.stride = times.shape[0]
+        self.n_nodes = samples.shape[0]
+        if self.sample_format != "f32" and self.n_nodes % 2:
+            raise ValueError("16 bits `samples` must have an even size.")
+
+        geometry = gfx.Geometry(
+            # 32 bits words, since storage buffers hold 32 bits types
+            samples=gfx.Buffer(samples.view(np.uint32), chunk_size=chunk_size),
+            times=gfx.Buffer(times, chunk_size=chunk_size),
+            channels=gfx.Buffer(channels),
+            colors=gfx.Buffer(colors),
+        )
+        super().__init__(geometry, material)
+
+    def update_samples(self, start: int, stop: int) -> None:
+        """Schedule the upload of the samples [start, stop) of the samples buffer."""
+        if self.sample_format == "f32":
+            self.geometry.samples.update_range(start, stop - start)
+            return
+        first = start // 2
+        self.geometry.samples.update_range(first, (stop + 1) // 2 - first)
+
+
+@register_wgpu_render_function(Traces, TraceMaterial)
+class TraceShader(LineShader):
+    """The pygfx line shader, with positions and colors computed from the traces buffers."""
+
+    def __init__(self, wobject):
+        super().__init__(wobject)
+        self["sample_format"] = wobject.sample_format
+
+    def get_bindings(self, wobject, shared):
+        material = wobject.material
+        geometry = wobject.geometry
+
+        uniform_buffer = gfx.Buffer(
+            array_from_shadertype(dict(last_i="i4", stride="i4")), force_contiguous=True
+        )
+        uniform_buffer.data["last_i"] = wobject.n_nodes - 1
+        uniform_buffer.data["stride"] = wobject.stride
+
+        rbuffer = "buffer/read_only_storage"
+        bindings = [
+            Binding("u_stdinfo", "buffer/uniform", shared.uniform_buffer),
+            Binding("u_wobject", "buffer/uniform", wobject.uniform_buffer),
+            Binding("u_material", "buffer/uniform", material.uniform_buffer),
+            Binding("u_renderer", "buffer/uniform", uniform_buffer),
+            Binding("s_samples", rbuffer, geometry.samples, "VERTEX"),
+            Binding("s_times", rbuffer, geometry.times, "VERTEX"),
+            Binding("s_channels", rbuffer, geometry.channels, "VERTEX"),
+            Binding("s_colors", rbuffer, geometry.colors, "VERTEX"),
+        ]
+        bindings = {i: b for i, b in enumerate(bindings)}
+        self.define_bindings(0, bindings)
+        return {0: bindings, 1: {}}
+
+    def get_render_info(self, wobject, shared):
+        # Six vertices per node, as in the line shader
+        render_mask = wobject.render_mask
+        if not render_mask:
+            # The colors have an alpha channel
+            render_mask = RenderMask.all
+            if wobject.material.is_transparent:
+                render_mask = RenderMask.transparent
+        return {"indices": (wobject.n_nodes * 6, 1, 0, 0), "render_mask": render_mask}
+
+    def get_code(self):
+        code = load_wgsl("line.wgsl")
+        code = code.replace("load_s_positions(", "load_trace_position(")
+        code = code.replace("load_s_colors(", "load_trace_color(")
+        return code + TRACE_WGSL
+
+
+TRACE_WGSL = """
+fn load_trace_sample(i: i32) -> f32 {
+    $$ if sample_format == 'f32'
+        return bitcast<f32>(s_samples[i]);
+    $$ elif sample_format == 'i16'
+        let word = s_samples[i / 2];
+        // Sign extension of the low or high 16 bits
+        var value = bitcast<i32>(word) >> 16u;
+        if (i % 2 == 0) {
+            value = bitcast<i32>(word << 16u) >> 16u;
+        }
+        if (value == -32768) {
+            return bitcast<f32>(0x7fc00000u);  // nan
+        }
+        return f32(value);
+    $$ else
+        let pair = unpack2x16float(s_samples[i / 2]);
+        return select(pair.x, pair.y, i % 2 == 1);
+    $$ endif
+}
+
+fn load_trace_position(i: i32) -> vec3<f32> {
+    let channel = i / u_renderer.stride;
+    let slot = i - channel * u_renderer.stride;
+    let table = load_s_channels(channel);
+    return vec3<f32>(load_s_times(slot), load_trace_sample(i) * table.x + table.y, 0.0);
+}
+
+fn load_trace_color(i: i32) -> vec4<f32> {
+    return load_s_colors(i / u_renderer.stride);
+}
+"""
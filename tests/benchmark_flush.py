@@ -0,0 +1,86 @@
+"""
+This script measures the time spent by PlotTsdFrame._flush to write the window into the
+per-channel sample rings and the shared time buffer, for an increasing number of channels.
+
+Run with:
+    python tests/benchmark_flush.py --channels 16 --channels 256 --channels 2048
+"""
+
+import os
+
+# Force offscreen rendering for headless environments (e.g., CI servers)
+os.environ["WGPU_FORCE_OFFSCREEN"] = "1"
+
+import time
+
+import click
+import numpy as np
+import pynapple as nap
+
+import pynaviz as viz
+
+DEFAULT_CHANNELS = (16, 64, 256, 1024, 2048)
+
+
+def time_flush(n_channels: int, repeat: int = 20, rate: float = 20000.0) -> tuple:
+    """
+    Return the number of samples per column of the window, and the median time
+    (in seconds) of a flush that rewrites the whole window and of a flush that pans
+    the window by 5%.
+    """
+    # Window of a plot alone in a memory budget group, capped by the canvas width
+    budget = viz.MemoryBudget()
+    probe = viz.PlotTsdFrame(
+        nap.TsdFrame(t=np.arange(2) / rate, d=np.zeros((2, n_channels), dtype="int16"))
+    )
+    size = min(probe._budget_to_samples(budget.share()), probe._screen_samples)
+    probe.close()
+
+    # Four windows worth of data, so that the plot streams
+    n_samples = 4 * size
+    t = np.arange(n_samples) / rate
+    d = np.random.randint(-1000, 1000, size=(n_samples, n_channels)).astype("int16")
+    v = viz.PlotTsdFrame(nap.TsdFrame(t=t, d=d))
+    budget.add(v)
+    stream = v._stream
+    if stream._pyramid is not None:
+        # Don't compete with the background build
+        stream._pyramid.wait_until_done()
+    n = len(stream)
+    shift = max(n // 20, 1)
+
+    jump, pan = [], []
+    for i in range(repeat):
+        start = (i % 2) * n
+        stream.buffer_slice = None
+        t0 = time.perf_counter()
+        v._flush(slice(start, start + n))
+        jump.append(time.perf_counter() - t0)
+
+        t0 = time.perf_counter()
+        v._flush(slice(start + shift, start + shift + n))
+        pan.append(time.perf_counter() - t0)
+
+    v.close()
+    return n, np.median(jump), np.median(pan)
+
+
+@click.command()
+@click.option(
+    "--channels",
+    "-c",
+    multiple=True,
+    type=int,
+    default=DEFAULT_CHANNELS,
+    help="Number of channels to benchmark (can be repeated).",
+)
+@click.option("--repeat", "-r", default=20, help="Number of flushes per measure.")
+def main(channels, repeat):
+    click.echo(f"{'channels':>10} {'samples':>10} {'full (ms)':>12} {'pan 5% (ms)':>12}")
+    for n_channels in channels:
+        size, jump, pan = time_flush(n_channels, repeat=repeat)
+        click.echo(f"{n_channels:>10} {size:>10} {jump * 1e3:>12.2f} {pan * 1e3:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
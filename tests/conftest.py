@@ -5,6 +5,7 @@ This module contains test fixtures required to set up
 and verify the functionality of modules in the pynaviz library.
 """
 import numpy as np
+import pynapple as nap
 import pytest
 import sys
 import os
@@ -24,6 +25,22 @@ def dummy_tsd():
 def dummy_tsdframe():
     return config.TsdFrameConfig.get_data()
 
+@pytest.fixture(scope="module")
+def long_int16_tsdframe():
+    """300 s of 64 int16 columns at 1 kHz, long enough for the plots to stream."""
+    t = np.arange(0, 300, 0.001)
+    d = np.random.randint(-1000, 1000, size=(len(t), 64)).astype("int16")
+    return nap.TsdFrame(t=t, d=d)
+
+@pytest.fixture
+def settle():
+    """Draw a streaming plot until the window requested in the background is flushed."""
+    def _settle(plot):
+        plot.animate()
+        plot._stream._worker.submit(lambda: None).result()
+        plot.animate()
+    return _settle
+
 @pytest.fixture
 def dummy_intervalset():
     return config.IntervalSetConfig.get_data()
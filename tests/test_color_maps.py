@@ -0,0 +1,36 @@
+"""
+Test for the metadata color mappings.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+from matplotlib import colormaps
+
+from pynaviz.threads.metadata_to_color_maps import (
+    map_color_array,
+    map_non_color_string_array,
+    map_numeric_arrays,
+    map_to_rgba,
+)
+
+
+@pytest.mark.parametrize(
+    "map_to_colors, values, kwargs",
+    [
+        (map_numeric_arrays, pd.Series([3.0, 1.0, 2.0, 1.0, 10.0]), dict(vmin=0, vmax=80)),
+        (map_non_color_string_array, pd.Series(["b", "a", "b", "c"]), {}),
+        (map_color_array, pd.Series(["red", "blue", "red"]), {}),
+    ],
+)
+def test_map_to_rgba(map_to_colors, values, kwargs):
+    if map_to_colors is not map_color_array:
+        kwargs["cmap"] = colormaps["jet"]
+    rgba = map_to_rgba(map_to_colors, values, **kwargs)
+    assert rgba.shape == (len(values), 4) and rgba.dtype == np.float32
+
+    # Same colors as the mapping dictionary
+    color_map = map_to_colors(values, **kwargs)
+    clipped = np.clip(values, None, 3.0) if map_to_colors is map_numeric_arrays else values
+    expected = [color_map[v].rgba for v in clipped]
+    np.testing.assert_allclose(rgba, expected, atol=1e-6)
@@ -6,7 +6,7 @@ import pytest
 from pygfx import cameras, controllers, renderers
 from wgpu.gui.offscreen import WgpuCanvas
 
-from pynaviz.controller import SpanController
+from pynaviz.controller import SpanController, SpanYLockController
 from pynaviz.synchronization_rules import _match_pan_on_x_axis, _match_zoom_on_x_axis
 
 
@@ -152,6 +152,35 @@ class TestPynaVizController:
         finally:
             canvas.close()
 
+    @pytest.mark.parametrize("auto_y", [True, False])
+    def test_update_pan_auto_y(self, auto_y):
+        camera = pygfx.OrthographicCamera()
+        canvas = WgpuCanvas()
+        renderer = renderers.WgpuRenderer(canvas)
+        try:
+            calls = []
+
+            def y_range_func(xmin, xmax):
+                calls.append((xmin, xmax))
+                return xmin, xmin + 10
+
+            ctrl = SpanController(
+                camera, renderer=renderer, auto_y=auto_y, y_range_func=y_range_func
+            )
+            ctrl.set_view(0, 1, -1, 1)
+            ctrl._update_pan(delta=(0.5, 0.0), vecx=np.array([-1.0, 0, 0]), vecy=np.zeros((3,)))
+            ctrl._update_cameras()
+            if auto_y:
+                np.testing.assert_allclose(calls[-1], (0.5, 1.5))
+                assert camera.local.x == pytest.approx(1)
+                assert camera.local.y == pytest.approx(5.5)
+                assert camera.height == pytest.approx(11)
+            else:
+                assert not calls
+                assert camera.height == pytest.approx(2)
+        finally:
+            canvas.close()
+
     @pytest.mark.parametrize(
         "update_dict, expectation",
         [
@@ -172,6 +201,40 @@ class TestPynaVizController:
         finally:
             canvas.close()
 
+    def test_sync_pan_updates_plots(self, event_pan_update):
+        camera = pygfx.OrthographicCamera()
+        canvas = WgpuCanvas()
+        renderer = renderers.WgpuRenderer(canvas)
+        try:
+            calls = []
+            ctrl = SpanController(
+                camera,
+                renderer=renderer,
+                dict_sync_funcs=dict(pan=_match_pan_on_x_axis),
+                plot_callbacks=[lambda **state: calls.append(state["position"][0])],
+            )
+            ctrl.sync(event_pan_update)
+            assert calls == [pytest.approx(camera.local.x)]
+        finally:
+            canvas.close()
+
+    @pytest.mark.parametrize("controller_class", [SpanController, SpanYLockController])
+    def test_zoom_updates_plots(self, controller_class):
+        camera = pygfx.OrthographicCamera(width=10, height=2)
+        canvas = WgpuCanvas()
+        renderer = renderers.WgpuRenderer(canvas)
+        try:
+            calls = []
+            ctrl = controller_class(
+                camera,
+                renderer=renderer,
+                plot_callbacks=[lambda **state: calls.append(state)],
+            )
+            ctrl._update_zoom((-1, 0))
+            assert len(calls) == 1
+        finally:
+            canvas.close()
+
     @pytest.mark.parametrize(
         "update_dict, expectation",
         [
@@ -0,0 +1,357 @@
+"""
+Test for the data streaming classes.
+"""
+import threading
+
+import numpy as np
+import pynapple as nap
+import pytest
+
+from pynaviz.threads.data_streaming import PrefetchCache, TsdFrameStreaming
+from pynaviz.threads.min_max_pyramid import MinMaxPyramid, reduce_min_max
+from pynaviz.threads.spike_count_pyramid import SpikeCountPyramid
+
+
+@pytest.fixture
+def long_tsdframe():
+    t = np.arange(0, 200, 0.001)
+    d = np.zeros((len(t), 3), dtype="float32")
+    # A single sample spike on the second channel
+    d[123457, 1] = 10.0
+    d[54321, 2] = -5.0
+    return nap.TsdFrame(t=t, d=d)
+
+
+def test_reduce_min_max():
+    values = np.arange(10, dtype="float64")[:, None]
+    out = reduce_min_max(values, 4)
+    assert out.shape == (3, 2, 1)
+    np.testing.assert_array_equal(out[:, 0, 0], [0, 4, 8])
+    np.testing.assert_array_equal(out[:, 1, 0], [3, 7, 9])
+
+    # Merging (min, max) pairs again
+    out2 = reduce_min_max(out, 2)
+    np.testing.assert_array_equal(out2[:, 0, 0], [0, 8])
+    np.testing.assert_array_equal(out2[:, 1, 0], [7, 9])
+
+
+def test_reduce_min_max_nan():
+    values = np.array([[np.nan], [1.0], [np.nan], [np.nan]])
+    out = reduce_min_max(values, 2)
+    assert out[0, 0, 0] == 1.0 and out[0, 1, 0] == 1.0
+    assert np.isnan(out[1, 0, 0])
+
+
+def test_pyramid_levels(long_tsdframe):
+    pyramid = MinMaxPyramid(long_tsdframe, base_bin=16, factor=4)
+    pyramid.wait_until_done()
+    assert pyramid.is_ready()
+    assert len(pyramid.levels) > 1
+    for level, values in enumerate(pyramid.levels):
+        n_bins = -(-long_tsdframe.shape[0] // pyramid.bin_size(level))
+        assert values.shape == (n_bins, 2, 3)
+        np.testing.assert_array_equal(values[:, 1].max(0), [0, 10, 0])
+        np.testing.assert_array_equal(values[:, 0].min(0), [0, 0, -5])
+
+
+def test_pyramid_size_cap(long_tsdframe):
+    # 200_000 samples x 3 channels, the finest level is capped at 6000 values
+    pyramid = MinMaxPyramid(long_tsdframe, base_bin=16, max_values=6000)
+    assert pyramid.base_bin == 200
+    pyramid.wait_until_done()
+    assert pyramid.levels[0].shape == (1000, 2, 3)
+    np.testing.assert_array_equal(pyramid.levels[-1][0], [[0, 0, -5], [0, 10, 0]])
+    np.testing.assert_array_equal(pyramid.get_range(0, 200_000), [[0, 0, -5], [0, 10, 0]])
+
+
+@pytest.mark.parametrize("max_points", [100, 1000, 5000])
+def test_pyramid_envelope_keeps_extremes(long_tsdframe, max_points):
+    pyramid = MinMaxPyramid(long_tsdframe)
+    pyramid.wait_until_done()
+    time, values = pyramid.get_envelope(0, long_tsdframe.shape[0], max_points)
+    assert time.shape[0] == values.shape[0]
+    assert time.shape[0] <= max_points
+    assert np.all(np.diff(time) >= 0)
+    np.testing.assert_array_equal(values.max(0), [0, 10, 0])
+    np.testing.assert_array_equal(values.min(0), [0, 0, -5])
+
+
+def test_pyramid_get_range():
+    rng = np.random.default_rng(0)
+    data = nap.TsdFrame(t=np.arange(100_000), d=rng.normal(size=(100_000, 2)))
+    pyramid = MinMaxPyramid(data, base_bin=16, factor=4)
+    pyramid.wait_until_done()
+    for start, stop in [(0, 100_000), (5, 7), (15, 17), (123, 98_765)] + [
+        tuple(np.sort(rng.integers(0, 100_000, 2))) for _ in range(20)
+    ]:
+        minmax = pyramid.get_range(start, stop)
+        if start == stop:
+            assert minmax is None
+            continue
+        np.testing.assert_array_equal(minmax[0], data.values[start:stop].min(0))
+        np.testing.assert_array_equal(minmax[1], data.values[start:stop].max(0))
+
+
+def test_spike_count_pyramid():
+    group = nap.TsGroup(
+        {i: nap.Ts(t=np.sort(np.random.uniform(0, 100, 1000 * (i + 1)))) for i in range(3)}
+    )
+    pyramid = SpikeCountPyramid(group, max_counts=3 * 1024, factor=4)
+    pyramid.wait_until_done()
+    assert [level.shape[1] for level in pyramid.levels] == [1024, 256, 64, 16, 4, 1]
+    np.testing.assert_array_equal(pyramid.levels[-1][:, 0], [1000, 2000, 3000])
+
+    # Bins of the coarsest level that fits, merged to about the requested number of bins
+    t0, width, counts = pyramid.get_counts(20, 60, 10)
+    assert width <= 4 and counts.shape[1] <= 2 * 10 + 2
+    assert t0 <= 20 and t0 + width * counts.shape[1] >= 60
+    for i, c in enumerate(group):
+        t = group[c].t
+        edges = t0 + width * np.arange(counts.shape[1] + 1)
+        np.testing.assert_array_equal(counts[i], np.histogram(t, edges)[0])
+
+    # Nothing finer than the first level
+    assert pyramid.get_counts(20, 21, 100) is None
+
+
+def test_streaming_read_envelope(long_tsdframe):
+    stream = TsdFrameStreaming(long_tsdframe, callback=lambda s: None, window_size=1)
+    stream._pyramid.wait_until_done()
+    slice_ = stream.get_slice(0, 150)
+    assert slice_.step > 1
+    time, values = stream.read(slice_)
+    assert time.shape[0] <= len(stream)
+    assert values.max() == 10.0
+    assert values.min() == -5.0
+    stream.close()
+
+
+def test_streaming_read_full_resolution(long_tsdframe):
+    stream = TsdFrameStreaming(
+        long_tsdframe, callback=lambda s: None, window_size=1, envelope=False
+    )
+    assert stream._pyramid is None
+    slice_ = stream.get_slice(0.2, 0.4)
+    time, values = stream.read(slice_)
+    np.testing.assert_array_equal(time, long_tsdframe.t[slice_])
+    np.testing.assert_array_equal(values, long_tsdframe.values[slice_])
+
+
+def test_streaming_get_slice_covers_window(long_tsdframe):
+    stream = TsdFrameStreaming(
+        long_tsdframe, callback=lambda s: None, window_size=1, envelope=False
+    )
+    slice_ = stream.get_slice(50, 51.5)
+    assert slice_.step > 1
+    assert long_tsdframe.t[slice_.start] <= 48.5
+    assert long_tsdframe.t[slice_.stop - 1] >= 52.9
+    assert len(range(slice_.start, slice_.stop, slice_.step)) <= len(stream)
+
+
+def test_streaming_zoom_in(long_tsdframe):
+    slices = []
+    stream = TsdFrameStreaming(
+        long_tsdframe, callback=slices.append, window_size=1, envelope=False
+    )
+    # Zooming out then in
+    stream.stream(position=(100, 0, 0), width=100)
+    assert slices[-1].step > 1
+    stream.buffer_slice = slices[-1]
+    stream.stream(position=(100, 0, 0), width=0.1)
+    slice_ = slices[-1]
+    assert slice_.step is None
+    assert slice_.stop - slice_.start == len(stream)
+    assert long_tsdframe.t[slice_.start] < 99.95 < 100.05 < long_tsdframe.t[slice_.stop - 1]
+
+    # The buffer covers the view, nothing to read
+    stream.buffer_slice = slice_
+    stream.stream(position=(100.2, 0, 0), width=0.1)
+    assert slices[-1] == slice_
+
+    # Clamped at the edges of the data
+    stream.stream(position=(0, 0, 0), width=0.1)
+    assert slices[-1] == slice(0, len(stream))
+
+
+def test_prefetch_cache(long_tsdframe):
+    cache = PrefetchCache(long_tsdframe, max_samples=3000)
+    assert cache.get(0, 10) is None
+
+    # Hold the worker so that the first read is still running at the second submit
+    gate = threading.Event()
+    cache.worker.submit(gate.wait)
+    cache.submit(0, 1000)
+    cache.submit(1000, 2000)  # Ignored, a read is running
+    assert cache._pending == (0, 1000)
+    gate.set()
+    time, values = cache.get(10, 500)  # Waits for the read
+    np.testing.assert_array_equal(time, long_tsdframe.t[10:500])
+    np.testing.assert_array_equal(values, long_tsdframe.values[10:500])
+    assert cache.covered_until(10) == 1000
+    assert cache.covered_from(500) == 0
+
+    # Reading across two blocks
+    cache.submit(1000, 2500)
+    time, values = cache.get(900, 1100)
+    np.testing.assert_array_equal(time, long_tsdframe.t[900:1100])
+
+    # Least recently used blocks are evicted
+    cache.submit(2500, 4000)
+    cache.future.result()
+    assert (0, 1000) not in cache.blocks
+    assert sum(b - a for a, b in cache.blocks) <= 3000
+    cache.shutdown()
+
+
+@pytest.mark.parametrize("direction", [1, -1])
+def test_streaming_prefetch_direction(long_tsdframe, direction):
+    def callback(slice_):
+        stream.buffer_slice = slice_
+
+    stream = TsdFrameStreaming(
+        long_tsdframe, callback=callback, window_size=1, envelope=False
+    )
+    for i in range(5):
+        # A prefetch is skipped while the previous one is running
+        if stream._cache.future is not None:
+            stream._cache.future.result()
+        stream.stream(position=(100 + direction * 0.2 * i, 0, 0), width=0.2)
+    assert np.sign(stream.velocity) == direction
+    stream._cache.future.result()
+    current = stream.buffer_slice
+    if direction > 0:
+        assert stream._cache.covered_until(current.stop) > current.stop
+    else:
+        assert stream._cache.covered_from(current.start) < current.start
+
+    # The next pan reads from the cache
+    new = slice(current.start + direction * 10, current.stop + direction * 10)
+    missing = slice(current.stop, new.stop) if direction > 0 else slice(new.start, current.start)
+    assert stream._cache.get(missing.start, missing.stop) is not None
+    time, values = stream.read(missing)
+    np.testing.assert_array_equal(values, long_tsdframe.values[missing])
+    stream.close()
+
+
+def test_streaming_set_columns(long_tsdframe):
+    stream = TsdFrameStreaming(long_tsdframe, callback=lambda s: None, window_size=1)
+    stream.set_columns([2, 0])
+    np.testing.assert_array_equal(stream.columns, [0, 2])
+
+    slice_ = stream.get_slice(10, 10.2)
+    time, values = stream.read(slice_)
+    np.testing.assert_array_equal(values, long_tsdframe.values[slice_][:, [0, 2]])
+
+    # The envelope only holds the streamed columns
+    stream._pyramid.wait_until_done()
+    time, values = stream.read(stream.get_slice(0, 150))
+    assert values.shape[1] == 2
+    assert values.min() == -5.0
+
+    # The cache reads the new columns
+    stream._cache.submit(1000, 2000)
+    stream._cache.future.result()
+    time, values = stream._cache.get(1000, 2000)
+    assert values.shape == (1000, 2)
+    stream.set_columns([1])
+    assert stream._cache.get(1000, 2000) is None
+    stream.close()
+
+
+def test_streaming_request_columns(long_tsdframe):
+    flushed = []
+
+    def callback(slice_):
+        flushed.append(stream.read(slice_))
+        stream.buffer_slice = slice_
+
+    layouts = []
+    stream = TsdFrameStreaming(
+        long_tsdframe,
+        callback=callback,
+        window_size=1,
+        envelope=False,
+        on_layout=lambda: layouts.append(stream.columns),
+    )
+    stream.stream(position=(10, 0, 0), width=0.2)
+    flushed.clear()
+
+    # The columns change once the window of the new columns is read
+    stream.request(position=(10, 0, 0), width=0.2, columns=[2, 0])
+    np.testing.assert_array_equal(stream.next_columns, [0, 2])
+    assert len(stream.columns) == 3
+    stream._worker.submit(lambda: None).result()
+    assert len(stream.columns) == 3
+
+    # And it is flushed from the samples read in the background
+    assert stream.apply()
+    np.testing.assert_array_equal(stream.columns, [0, 2])
+    assert len(layouts) == 1
+    slice_ = stream.buffer_slice
+    assert stream._cache.get(slice_.start, slice_.stop) is not None
+    np.testing.assert_array_equal(flushed[0][1], long_tsdframe.values[slice_][:, [0, 2]])
+
+    # Requesting the current columns drops a pending change
+    stream.request(position=(20, 0, 0), width=0.2, columns=[1])
+    stream.request(position=(20, 0, 0), width=0.2, columns=[0, 2])
+    stream._worker.submit(lambda: None).result()
+    assert stream.apply()
+    np.testing.assert_array_equal(stream.columns, [0, 2])
+    assert len(layouts) == 1
+    stream.close()
+
+
+def test_streaming_get_range(long_tsdframe):
+    stream = TsdFrameStreaming(long_tsdframe, callback=lambda s: None, window_size=1)
+    stream._pyramid.wait_until_done()
+    np.testing.assert_array_equal(stream.get_range(0, 200), [[0, 0], [0, 10], [-5, 0]])
+    np.testing.assert_array_equal(stream.get_range(100, 200), [[0, 0], [0, 10], [0, 0]])
+    stream.close()
+
+
+def test_streaming_request_coalesced(long_tsdframe):
+    flushed = []
+
+    def callback(slice_):
+        flushed.append(slice_)
+        stream.buffer_slice = slice_
+
+    stream = TsdFrameStreaming(
+        long_tsdframe, callback=callback, window_size=20, envelope=False, prefetch=False
+    )
+    ready = threading.Event()
+    stream.on_ready = ready.set
+
+    # Hold the worker in the first read
+    gate = threading.Event()
+    read = stream._cache._read
+
+    def slow_read(*args):
+        gate.wait()
+        read(*args)
+
+    stream._cache._read = slow_read
+    for position in (50, 60, 70):
+        stream.request(position=(position, 0, 0), width=0.2)
+    gate.set()
+    assert ready.wait(timeout=5)
+    stream._worker.submit(lambda: None).result()
+
+    # Nothing is flushed until `apply`, and only the newest window is
+    assert flushed == []
+    assert stream.apply()
+    assert flushed == [stream._select_slice(69.9, 70.1)]
+    assert not stream.apply()
+
+    # The read of the first window stopped after its first block
+    first = stream._select_slice(49.9, 50.1)
+    assert stream._cache.covered_until(first.start) < first.stop
+    time, values = stream.read(flushed[0])
+    np.testing.assert_array_equal(time, long_tsdframe.t[flushed[0]])
+
+    # Requests made before a change of columns are dropped
+    stream.request(position=(100, 0, 0), width=0.2)
+    stream._worker.submit(lambda: None).result()
+    stream.set_columns([0])
+    assert not stream.apply()
+    stream.close()
@@ -0,0 +1,85 @@
+"""
+Test for the memory budget of the streaming plots.
+"""
+import numpy as np
+import pynapple as nap
+import pytest
+
+import pynaviz as viz
+from pynaviz import memory_budget
+from pynaviz.memory_budget import BYTES_PER_SAMPLE, MemoryBudget
+
+
+class DummyPlot:
+    def __init__(self):
+        self.budget = None
+
+    def set_memory_budget(self, nbytes):
+        self.budget = nbytes
+
+
+@pytest.fixture
+def large_tsdframe():
+    t = np.arange(0, 300, 0.001)
+    d = np.random.uniform(-1, 1, size=(len(t), 16)).astype("float32")
+    return nap.TsdFrame(t=t, d=d)
+
+
+def test_memory_budget_split():
+    group = MemoryBudget(total=1200)
+    plots = [DummyPlot() for _ in range(3)]
+    for p in plots:
+        group.add(p)
+    assert [p.budget for p in plots] == [400, 400, 400]
+
+    # A fixed budget is kept, the others share what remains
+    fixed = DummyPlot()
+    group.add(fixed, nbytes=600)
+    assert fixed.budget == 600
+    assert [p.budget for p in plots] == [200, 200, 200]
+
+    # Closing plots gives their share back
+    group.remove(plots[0])
+    group.remove(fixed)
+    assert plots[0] not in group
+    assert len(group) == 2
+    assert [p.budget for p in plots[1:]] == [600, 600]
+
+    # Plots that don't stream are ignored
+    group.add(object())
+    assert len(group) == 2
+
+
+def test_set_default_memory_budget():
+    default = memory_budget.get_default_memory_budget()
+    try:
+        viz.set_default_memory_budget(1024)
+        assert MemoryBudget().total == 1024
+        with pytest.raises(ValueError):
+            viz.set_default_memory_budget(0)
+    finally:
+        viz.set_default_memory_budget(default)
+
+
+def test_plot_tsdframe_memory_budget(large_tsdframe, settle):
+    nbytes = 16 * BYTES_PER_SAMPLE * 4_000
+    v = viz.PlotTsdFrame(large_tsdframe, memory_budget=nbytes)
+    assert len(v._stream) == 4_000
+    assert v._samples.shape[0] == 16 * (4_000 + 3)
+
+    # Shrinking and growing the window
+    group = MemoryBudget(total=nbytes)
+    w = viz.PlotTsdFrame(large_tsdframe)
+    group.add(v)
+    group.add(w)
+    settle(v)
+    settle(w)
+    assert len(v._stream) == len(w._stream) == 2_000
+    assert v._samples.shape[0] == 16 * (2_000 + 3)
+    assert v._stream.buffer_slice.stop - v._stream.buffer_slice.start <= 2_000
+
+    group.remove(w)
+    settle(v)
+    assert len(v._stream) == 4_000
+    v.close()
+    w.close()
@@ -4,7 +4,7 @@ Test for IntervalSet.
 import pathlib
 
 import numpy as np
-import pygfx as gfx
+import pynapple as nap
 import pytest
 from PIL import Image
 
@@ -21,9 +21,29 @@ def test_plot_iset_init(dummy_intervalset):
     v = viz.PlotIntervalSet(dummy_intervalset)
 
     assert isinstance(v.controller, viz.controller.SpanController)
-    assert isinstance(v.graphic, dict)
-    for m in v.graphic.values():
-        assert isinstance(m, gfx.Mesh)
+    assert isinstance(v.graphic, viz.intervals.Intervals)
+    assert not v.graphic.material.span_view
+    np.testing.assert_array_equal(
+        v.graphic.times,
+        np.stack((dummy_intervalset.start, dummy_intervalset.end), axis=1),
+    )
+
+
+def test_plot_iset_tables(dummy_intervalset):
+    v = viz.PlotIntervalSet(dummy_intervalset)
+    n = len(dummy_intervalset)
+    rows = v.graphic.geometry.rows.data[:n]
+    np.testing.assert_array_equal(rows, v._manager.row_table())
+
+    v.set_visible({0: False})
+    assert v.graphic.geometry.rows.data[0, 2] == 0
+    assert np.all(v.graphic.geometry.rows.data[1:n, 2] == 1)
+
+    v.color_by("reward", cmap_name="jet")
+    colors = v.graphic.geometry.colors.data[:n]
+    reward = dummy_intervalset.reward.values
+    np.testing.assert_array_equal(colors[reward == 0], colors[reward == 0][:1].repeat(3, 0))
+    assert not np.array_equal(colors[reward == 0][0], colors[reward == 1][0])
 
 
 @pytest.mark.parametrize(
@@ -45,3 +65,26 @@ def test_plot_intervalset_action(dummy_intervalset, func, kwargs):
         pathlib.Path(__file__).parent / "screenshots" / filename
     ).convert("RGBA")
     np.allclose(np.array(image), image_data)
+
+
+def test_interval_set_overlay_in_view(dummy_tsgroup):
+    v = viz.PlotTsGroup(dummy_tsgroup)
+    epochs = nap.IntervalSet(np.arange(0, 2000, 2.0), np.arange(1, 2001, 2.0))
+    v.add_interval_sets(epochs, labels="overlay")
+    rectangles = v._interval_rects["overlay"]
+    assert isinstance(rectangles, viz.intervals.Intervals)
+
+    assert rectangles.material.span_view
+
+    # Only the intervals in view are drawn
+    v.controller.set_view(10.5, 14.5, -1, 3)
+    v.animate()
+    assert rectangles.geometry.intervals.draw_range == (5, 3)
+
+    # A pan or a y-zoom writes no per-interval table, the view is read by the shader
+    rows = rectangles.geometry.rows
+    v.controller.set_view(12.5, 16.5, 0, 1)
+    v._update_all_isets()
+    assert rectangles.geometry.intervals.draw_range == (6, 3)
+    assert rows._gfx_get_chunk_descriptions() == []
+    assert rectangles.geometry.colors._gfx_get_chunk_descriptions() == []
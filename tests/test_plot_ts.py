@@ -0,0 +1,48 @@
+"""
+Test for PlotTs.
+"""
+import numpy as np
+import pynapple as nap
+
+import pynaviz as viz
+
+
+def test_plot_ts_init():
+    ts = nap.Ts(t=np.sort(np.random.uniform(0, 100, 1000)))
+    v = viz.PlotTs(ts)
+    assert isinstance(v.controller, viz.controller.SpanController)
+    assert isinstance(v.graphic, viz.raster.Raster)
+    v.animate()
+    v.close()
+
+
+def test_plot_ts_streaming():
+    t = np.sort(np.random.uniform(0, 10_000, 1_000_000))
+    v = viz.PlotTs(nap.Ts(t=t))
+    times = v.graphic.geometry.times
+
+    # Only the events around the view are in the buffer
+    start = t[0]
+    expected = t[(t >= start - 1) & (t < start + 2)]
+    assert times.draw_range == (0, len(expected))
+    np.testing.assert_allclose(times.data[: len(expected)] + v._time_origin, expected, atol=1e-4)
+    assert np.all(v.graphic.geometry.units.data[: len(expected)] == 0)
+    assert times.nitems < 10_000
+
+    # Zoomed out, the events are drawn as a density strip and the buffer stays small
+    v._pyramid.wait_until_done()
+    v._stream_spikes(position=(5_000, 0, 0), width=10_000)
+    assert v._density_mode and v.density.visible
+    assert v._density_counts[2].sum() == len(t)
+    assert v.density.material.map.texture.data.shape[0] == 1
+    assert v.graphic.geometry.times.nitems < 10_000
+
+    # Zoomed in far from the start
+    v._stream_spikes(position=(7_000.5, 0, 0), width=1)
+    expected = t[(t >= 6_999) & (t < 7_002)]
+    times = v.graphic.geometry.times
+    assert not v._density_mode
+    np.testing.assert_allclose(
+        times.data[: len(expected)] + v._time_origin, expected, atol=1e-3
+    )
+    v.close()
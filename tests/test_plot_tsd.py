@@ -4,6 +4,7 @@ Test for PlotTsd.
 import pathlib
 
 import numpy as np
+import pynapple as nap
 import pygfx as gfx
 import pytest
 from PIL import Image
@@ -56,3 +57,49 @@ def test_plot_tsd_actions(dummy_tsd):
     ).convert("RGBA")
 
     np.allclose(np.array(image), image_data)
+
+
+def test_plot_tsd_streaming():
+    t = np.arange(0, 3600, 0.001)
+    d = np.sin(t).astype("float32")
+    d[1_000_000] = 50  # A single sample spike
+    v = viz.PlotTsd(nap.Tsd(t=t, d=d))
+    stream = v._stream
+    stream._pyramid.wait_until_done()
+
+    # Only a window of the series is in memory
+    assert v._positions.shape[0] == len(stream) < len(t) // 100
+    sl = stream.buffer_slice
+    assert sl.start == 0
+    np.testing.assert_array_equal(v._positions[: sl.stop, 1], d[sl])
+
+    # Panning reads a new window
+    stream.stream(position=(1000, 0, 0), width=1)
+    sl = stream.buffer_slice
+    assert sl.start <= 1_000_000 < sl.stop
+    n = sl.stop - sl.start
+    np.testing.assert_array_equal(v._positions[:n, 1], d[sl])
+    assert np.all(np.isnan(v._positions[n:, 1]))
+
+    # Zoomed out, the envelope keeps the spike
+    stream.stream(position=(1800, 0, 0), width=3600)
+    assert stream.buffer_slice.step > 1
+    assert np.nanmax(v._positions[:, 1]) == 50
+    assert v._get_min_max() == pytest.approx((-1, 50), abs=1e-3)
+    v.close()
+
+
+def test_plot_tsd_time_origin():
+    t = 1e5 + np.arange(0, 10, 1 / 30000)
+    v = viz.PlotTsd(nap.Tsd(t=t, d=np.sin(t)))
+    v.controller.set_view(1e5 + 5, 1e5 + 5.01, -1, 1)
+    v._stream.stream(position=(1e5 + 5.005, 0, 0), width=0.01)
+    v.animate()
+    assert v._time_origin == pytest.approx(1e5 + 5.005)
+
+    # Sub-microsecond precision around the view
+    sl = v._stream.buffer_slice
+    x = v._positions[: sl.stop - sl.start, 0]
+    np.testing.assert_allclose(x + v._time_origin, t[sl], rtol=0, atol=1e-7)
+    assert np.all(np.diff(x) > 0)
+    v.close()
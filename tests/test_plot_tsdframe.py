@@ -2,13 +2,18 @@
 Test for PlotTsdFrame
 """
 import pathlib
+import threading
+import weakref
 
 import numpy as np
 import pygfx as gfx
+import pynapple as nap
 import pytest
 from PIL import Image
 
 import pynaviz as viz
+from pynaviz.base_plot import _poll_draw_requests
+from pynaviz.memory_budget import BYTES_PER_SAMPLE
 import sys
 
 sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
@@ -43,3 +48,450 @@ def test_plot_tsdframe_action(dummy_tsdframe, func, kwargs):
     ).convert("RGBA")
     np.allclose(np.array(image), image_data)
 
+
+def test_plot_tsdframe_zoom_in_full_resolution(long_int16_tsdframe):
+    v = viz.PlotTsdFrame(long_int16_tsdframe)
+    t, d = v.data.t, v.data.values
+    stream = v._stream
+    stream._pyramid.wait_until_done()
+
+    def assert_buffer_is_data():
+        sl = stream.buffer_slice
+        assert sl.step is None
+        slots = (np.arange(sl.start, sl.stop) - v._ring_origin) % v._ring_size
+        for i, c in enumerate(v.data.columns):
+            b = v._buffer_slices[c]
+            ring = v._samples[b.start : b.start + v._ring_size]
+            np.testing.assert_array_equal(v._times[slots], t[sl].astype("float32"))
+            np.testing.assert_array_equal(ring[slots], d[sl, i])
+            # Every other slot is empty
+            assert np.sum(~np.isnan(ring)) == sl.stop - sl.start
+
+    # Zoom out, the buffer holds the envelope
+    stream.stream(position=(100, 0, 0), width=150)
+    assert stream.buffer_slice.step > 1
+
+    # Zoom back in
+    stream.stream(position=(100, 0, 0), width=0.5)
+    assert_buffer_is_data()
+
+    # Moving the window reuses the overlapping samples
+    stream.stream(position=(101, 0, 0), width=0.5)
+    assert_buffer_is_data()
+    stream.stream(position=(99, 0, 0), width=0.5)
+    assert_buffer_is_data()
+    v.close()
+
+
+def test_plot_tsdframe_ring_buffer_partial_upload(long_int16_tsdframe):
+    v = viz.PlotTsdFrame(long_int16_tsdframe)
+    stream = v._stream
+    buffer = v.graphic.geometry.samples
+
+    stream.stream(position=(100, 0, 0), width=0.5)
+    current = stream.buffer_slice
+    buffer._gfx_get_chunk_descriptions()  # Clear the pending uploads
+
+    # Panning by a few samples only uploads the slots that changed in each column
+    shift = 100
+    v._flush(slice(current.start + shift, current.stop + shift))
+    uploaded = sum(size for _, size in buffer._gfx_get_chunk_descriptions())
+    assert 0 < uploaded < buffer.nitems // 4
+
+    # The wrap slot continues the line
+    sl = stream.buffer_slice
+    ring = v._samples[: v._ring_size + 1]
+    last = (sl.stop - 1 - v._ring_origin) % v._ring_size
+    first = (sl.start - v._ring_origin) % v._ring_size
+    assert np.isnan(ring[(last + 1) % v._ring_size])
+    if first == 0:
+        assert np.isnan(ring[v._ring_size])
+    else:
+        np.testing.assert_array_equal(ring[v._ring_size], ring[0])
+    v.close()
+
+
+def test_plot_tsdframe_set_visible(long_int16_tsdframe, settle):
+    v = viz.PlotTsdFrame(long_int16_tsdframe)
+    d = v.data.values
+    stream = v._stream
+    n_items = v.graphic.geometry.samples.nitems
+
+    # Hide all but 8 columns
+    v.set_visible({c: c % 8 == 0 for c in v.data.columns})
+    settle(v)
+    np.testing.assert_array_equal(stream.columns, np.arange(0, 64, 8))
+    assert v.graphic.geometry.samples.nitems == n_items // 8
+    assert list(v._buffer_slices) == list(range(0, 64, 8))
+
+    stream.stream(position=(100, 0, 0), width=0.5)
+    sl = stream.buffer_slice
+    time, values = stream.read(sl)
+    assert values.shape == (sl.stop - sl.start, 8)
+    slots = (np.arange(sl.start, sl.stop) - v._ring_origin) % v._ring_size
+    for c, b in v._buffer_slices.items():
+        ring = v._samples[b.start : b.start + v._ring_size]
+        np.testing.assert_array_equal(ring[slots], d[sl, c])
+
+    # Showing them back
+    v.set_visible({c: True for c in v.data.columns})
+    settle(v)
+    assert len(stream.columns) == 64
+    assert v.graphic.geometry.samples.nitems == n_items
+    v.close()
+
+
+def test_plot_tsdframe_hidden_not_drawn():
+    t = np.arange(0, 10, 0.001)
+    d = np.random.uniform(-0.4, 0.4, size=(len(t), 2)).astype("float32")
+    v = viz.PlotTsdFrame(nap.TsdFrame(t=t, d=d))
+    v._set_colors(np.float32([[0, 0, 1, 1], [1, 0, 0, 1]]))
+    v.animate()
+
+    def red_pixels():
+        image = v.renderer.snapshot()
+        return np.sum((image[..., 0] > 200) & (image[..., 1] < 50) & (image[..., 2] < 50))
+
+    assert red_pixels() > 0
+
+    # Drawn without the hidden column before the new page is read
+    gate = threading.Event()
+    v._stream._worker.submit(gate.wait)
+    v.set_visible({1: False})
+    v.animate()
+    assert len(v._stream.columns) == 2
+    assert red_pixels() == 0
+    gate.set()
+    v.close()
+
+
+def test_plot_tsdframe_get_min_max(long_int16_tsdframe):
+    v = viz.PlotTsdFrame(long_int16_tsdframe)
+    d = v.data.values
+
+    # From the buffer until the pyramid is built
+    v._stream._pyramid.wait_until_done()
+    v._stream.buffer_slice = None
+    v._flush(slice(0, 1000))
+    v._stream._pyramid.levels.clear()
+    minmax = v._get_min_max()
+    np.testing.assert_array_equal(minmax[:, 0], d[0:1000].min(0))
+    np.testing.assert_array_equal(minmax[:, 1], d[0:1000].max(0))
+
+    # Then from the pyramid
+    v._stream._pyramid._build()
+    minmax = v._get_min_max()
+    np.testing.assert_array_equal(minmax[:, 0], d.min(0))
+    np.testing.assert_array_equal(minmax[:, 1], d.max(0))
+    minmax = v._get_min_max(100, 101)
+    np.testing.assert_array_equal(minmax[:, 1], d[100000:101001].max(0))
+    v.close()
+
+
+def test_plot_tsdframe_auto_y():
+    t = np.arange(0, 100, 0.001)
+    d = np.random.uniform(-1, 1, size=(len(t), 4)).astype("float32")
+    d[len(t) // 2 :] *= 100
+    v = viz.PlotTsdFrame(nap.TsdFrame(t=t, d=d))
+    v._stream._pyramid.wait_until_done()
+    camera = v.controller.camera
+
+    def pan_from(start, delta):
+        v.controller.set_view(start, start + 1, -1, 1)
+        v.controller._update_pan(
+            delta=(delta, 0), vecx=np.array([-1.0, 0, 0]), vecy=np.zeros(3)
+        )
+        v.controller._update_cameras()
+
+    # Disabled by default
+    pan_from(10, 0.1)
+    assert camera.height == pytest.approx(2)
+
+    # Panning from the small to the large amplitudes
+    v.controller.auto_y = True
+    pan_from(10, 60)
+    ymin, ymax = v._get_y_range(70, 71)
+    assert ymax - ymin > 150
+    assert camera.local.y - camera.height / 2 <= ymin
+    assert camera.local.y + camera.height / 2 >= ymax
+    v.close()
+
+
+def test_plot_tsdframe_follows_canvas_width(long_int16_tsdframe, settle):
+    v = viz.PlotTsdFrame(long_int16_tsdframe[:, :4])
+    width = v.renderer.logical_size[0]
+    assert len(v._stream) == v._screen_to_samples(width, v.canvas.get_pixel_ratio())
+
+    def resize(width, pixel_ratio=1.0):
+        v.renderer.dispatch_event(
+            gfx.WindowEvent(type="resize", width=width, height=400, pixel_ratio=pixel_ratio)
+        )
+
+    # A wide canvas on a high density screen gets more samples
+    resize(2000, pixel_ratio=2.0)
+    settle(v)
+    assert len(v._stream) == v._screen_to_samples(4000, 1.0)
+    assert v._samples.shape[0] == 4 * (len(v._stream) + 3)
+
+    # Small changes of width don't reallocate the buffers
+    samples = v._samples
+    resize(1999, pixel_ratio=2.0)
+    settle(v)
+    assert v._samples is samples
+
+    # A narrow dock gets less, and the buffer is refilled
+    resize(300)
+    settle(v)
+    assert len(v._stream) < v._screen_to_samples(width, 1.0)
+    assert v._stream.buffer_slice is not None
+    assert np.sum(~np.isnan(v._samples[: v._ring_size])) > 0
+
+    # The memory budget is still an upper bound
+    v.set_memory_budget(4 * BYTES_PER_SAMPLE * 100)
+    settle(v)
+    assert len(v._stream) == 100
+    v.close()
+
+
+def test_plot_tsdframe_ready_draw_on_gui_thread(long_int16_tsdframe):
+    v = viz.PlotTsdFrame(long_int16_tsdframe)
+    threads = []
+    v.canvas.request_draw = lambda *args: threads.append(threading.get_ident())
+
+    # The window read in the background only flags a draw
+    v._stream.request(position=(100, 0, 0), width=0.5)
+    v._stream._worker.submit(lambda: None).result()
+    assert threads == [] and v._draw_requested.is_set()
+
+    # Which is requested by the next poll of the GUI thread
+    _poll_draw_requests(weakref.ref(v))
+    assert threads == [threading.get_ident()]
+    assert not v._draw_requested.is_set()
+    v.close()
+
+
+def test_plot_tsdframe_request_keeps_buffer(long_int16_tsdframe):
+    v = viz.PlotTsdFrame(long_int16_tsdframe)
+    d = v.data.values
+    stream = v._stream
+    current = stream.buffer_slice
+    samples = v._samples.copy()
+
+    # The window is read in the background, the buffer on screen is left untouched
+    stream.request(position=(100, 0, 0), width=0.5)
+    stream._worker.submit(lambda: None).result()
+    assert stream.buffer_slice == current
+    np.testing.assert_array_equal(v._samples, samples)
+
+    # And flushed on the next draw
+    v.animate()
+    sl = stream.buffer_slice
+    assert sl.start <= 100000 < sl.stop
+    slots = (np.arange(sl.start, sl.stop) - v._ring_origin) % v._ring_size
+    np.testing.assert_array_equal(v._samples[slots], d[sl, 0])
+    v.close()
+
+
+@pytest.mark.parametrize("dtype, fmt", [("int16", "i16"), ("float32", "f16")])
+def test_plot_tsdframe_compact(dtype, fmt):
+    t = np.arange(0, 60, 0.001)
+    d = np.random.randint(-1000, 1000, size=(len(t), 4)).astype(dtype)
+    d[1000:1010, 3] = np.nan if dtype == "float32" else d[1000:1010, 3]
+    images = []
+    for compact in (False, True):
+        v = viz.PlotTsdFrame(nap.TsdFrame(t=t, d=d), compact=compact)
+        v._stream._pyramid.wait_until_done()
+        for position, width in [(20, 0.5), (20.2, 0.5), (30, 5)]:
+            v.controller.set_view(position - width / 2, position + width / 2, -1e4, 1e4)
+            v._stream.stream(position=(position, 0, 0), width=width)
+            v.animate()
+            images.append(v.renderer.snapshot())
+        if compact:
+            assert v._sample_format == fmt
+            assert v._samples.itemsize == 2
+            assert v.graphic.geometry.samples.nbytes <= f32_nbytes / 2 + 2
+        else:
+            assert v._samples.dtype == np.float32
+            f32_nbytes = v.graphic.geometry.samples.nbytes
+        v.close()
+
+    # Same picture, with half the bytes per sample
+    n = len(images) // 2
+    for default, compact in zip(images[:n], images[n:]):
+        np.testing.assert_array_equal(default, compact)
+
+
+@pytest.mark.parametrize(
+    "dtype, fmt",
+    [("int8", "i16"), ("uint8", "i16"), ("int16", "i16"), ("float32", "f16"), ("float64", "f16")],
+)
+def test_sample_format(dtype, fmt):
+    assert viz.traces.sample_format(dtype) == fmt
+
+
+@pytest.mark.parametrize("dtype", ["uint16", "int32", "uint32", "int64"])
+def test_sample_format_inexact(dtype):
+    # Not exact in float16, kept as float32
+    with pytest.warns(UserWarning, match="16 bits"):
+        assert viz.traces.sample_format(dtype) == "f32"
+
+
+def test_plot_tsdframe_compact_partial_upload(long_int16_tsdframe):
+    v = viz.PlotTsdFrame(long_int16_tsdframe[:, :8], compact=True)
+    t, d = v.data.t, v.data.values
+    stream = v._stream
+    samples = v.graphic.geometry.samples
+    times = v.graphic.geometry.times
+
+    stream.stream(position=(100, 0, 0), width=0.5)
+    current = stream.buffer_slice
+    samples._gfx_get_chunk_descriptions()
+    times._gfx_get_chunk_descriptions()
+
+    # Panning only uploads the new slots, and the time of a slot once for all the columns
+    v._flush(slice(current.start + 100, current.stop + 100))
+    assert 0 < sum(n for _, n in samples._gfx_get_chunk_descriptions()) < samples.nitems // 4
+    assert 0 < sum(n for _, n in times._gfx_get_chunk_descriptions()) < times.nitems // 4
+    sl = stream.buffer_slice
+    slots = (np.arange(sl.start, sl.stop) - v._ring_origin) % v._ring_size
+    np.testing.assert_array_equal(v._times[slots], t[sl].astype("float32"))
+    for i, (c, b) in enumerate(v._buffer_slices.items()):
+        np.testing.assert_array_equal(v._samples[b][slots], d[sl, i])
+
+    # Sorting only changes the table of scales and offsets
+    v._manager.offset = np.arange(8.0)
+    v._update("sort_by")
+    assert stream.buffer_slice == sl
+    np.testing.assert_array_equal(
+        v.graphic.geometry.channels.data[:, 1], v._manager.offset
+    )
+    v.close()
+
+
+def test_plot_tsdframe_time_origin():
+    # 30 kHz, 28 hours after the start of the recording
+    t = 1e5 + np.arange(0, 20, 1 / 30000)
+    d = np.random.uniform(-1, 1, size=(len(t), 2)).astype("float32")
+    v = viz.PlotTsdFrame(nap.TsdFrame(t=t, d=d))
+    v._stream._pyramid.wait_until_done()
+
+    v.controller.set_view(1e5 + 10, 1e5 + 10.01, -5, 5)
+    v._stream.stream(position=(1e5 + 10.005, 0, 0), width=0.01)
+    v.animate()
+    assert v._time_origin == pytest.approx(1e5 + 10.005)
+
+    # Samples collapse in absolute float32 times, not relative to the origin
+    sl = v._stream.buffer_slice
+    slots = (np.arange(sl.start, sl.stop) - v._ring_origin) % v._ring_size
+    assert len(np.unique(t[sl].astype("float32"))) < (sl.stop - sl.start) // 10
+    assert np.all(np.diff(v._times[slots]) > 0)
+    np.testing.assert_allclose(v._times[slots] + v._time_origin, t[sl], rtol=0, atol=1e-7)
+
+    # The rulers show absolute times
+    assert v.ruler_x.start_value == pytest.approx(1e5 + 10)
+    assert abs(v.ruler_x.start_pos[0]) < 0.01
+
+    # Small pans keep the origin, far ones move it and rewrite the time axis only
+    v.controller.set_view(1e5 + 10.1, 1e5 + 10.11, -5, 5)
+    v.animate()
+    assert v._time_origin == pytest.approx(1e5 + 10.005)
+    v.controller.set_view(1e5 + 15, 1e5 + 15.01, -5, 5)
+    v._stream.stream(position=(1e5 + 15.005, 0, 0), width=0.01)
+    v.animate()
+    assert v._time_origin == pytest.approx(1e5 + 15.005)
+    sl = v._stream.buffer_slice
+    slots = (np.arange(sl.start, sl.stop) - v._ring_origin) % v._ring_size
+    np.testing.assert_allclose(v._times[slots] + v._time_origin, t[sl], rtol=0, atol=1e-7)
+    v.close()
+
+
+def test_plot_tsdframe_vertical_paging(settle):
+    t = np.arange(0, 10, 0.001)
+    d = np.random.uniform(-0.4, 0.4, size=(len(t), 200)).astype("float32")
+    v = viz.PlotTsdFrame(nap.TsdFrame(t=t, d=d))
+    v._stream._pyramid.wait_until_done()
+    stream = v._stream
+
+    # One row per column, 10 rows in view
+    v._manager.offset = np.arange(200.0)
+    v._update_channel_table()
+    v.controller.set_ylim(50, 60)
+
+    # The page is read in the background, the buffer on screen is left untouched
+    samples = v._samples
+    v.animate()
+    np.testing.assert_array_equal(stream.next_columns, np.arange(40, 71))
+    assert len(stream.columns) == 200
+    stream._worker.submit(lambda: None).result()
+    assert v._samples is samples
+
+    # And uploaded on the next draw
+    v.animate()
+    np.testing.assert_array_equal(stream.columns, np.arange(40, 71))
+    assert v._rings.shape[0] == 31
+
+    # The rows in view are read
+    sl = stream.buffer_slice
+    slots = (np.arange(sl.start, sl.stop) - v._ring_origin) % v._ring_size
+    b = v._buffer_slices[55]
+    np.testing.assert_array_equal(v._samples[b][slots], d[sl, 55])
+
+    # Scrolling within the page keeps the buffers
+    samples = v._samples
+    v.controller.set_ylim(58, 68)
+    v.animate()
+    assert v._samples is samples
+
+    # Scrolling further pages the rows in view
+    v.controller.set_ylim(100, 110)
+    settle(v)
+    np.testing.assert_array_equal(stream.columns, np.arange(90, 121))
+
+    # Hidden rows are not streamed
+    v.set_visible({c: c % 2 == 0 for c in v.data.columns})
+    settle(v)
+    np.testing.assert_array_equal(stream.columns, np.arange(90, 121, 2))
+    v.close()
+
+
+def test_plot_tsdframe_row_table(dummy_tsdframe):
+    v = viz.PlotTsdFrame(dummy_tsdframe)
+    geometry = v.graphic.geometry
+    geometry.samples._gfx_get_chunk_descriptions()
+    geometry.times._gfx_get_chunk_descriptions()
+
+    class KeyEvent:
+        type = "key_down"
+
+        def __init__(self, key):
+            self.key = key
+
+    # Sorting, rescaling and resetting only upload the per-column table
+    v.sort_by("channel")
+    v._rescale(KeyEvent("i"))
+    table = v._manager.row_table(v._stream.columns)
+    np.testing.assert_allclose(geometry.channels.data[: len(table), :2], table[:, :2])
+    np.testing.assert_allclose(table[:, 1], np.array([1, 3, 0, 2, 4]) + 1)
+    v._reset(KeyEvent("r"))
+    np.testing.assert_array_equal(geometry.channels.data[:5, 0], 1)
+    assert geometry.samples._gfx_get_chunk_descriptions() == []
+    assert geometry.times._gfx_get_chunk_descriptions() == []
+    v.close()
+
+
+def test_plot_tsdframe_paging_off_zero(settle):
+    # Unsorted rows of data far from y=0 are all in view
+    t = np.arange(0, 10, 0.001)
+    d = 250 + np.random.uniform(-1, 1, size=(len(t), 8)).astype("float32")
+    v = viz.PlotTsdFrame(nap.TsdFrame(t=t, d=d))
+    v._stream._pyramid.wait_until_done()
+    v.controller.set_view(4, 6, 245, 255)
+    settle(v)
+    np.testing.assert_array_equal(v._stream.columns, np.arange(8))
+    assert v._get_y_range(4, 6) == pytest.approx((249, 251), abs=0.01)
+
+    # Away from the data, the rows are not streamed
+    v.controller.set_view(4, 6, -10, 10)
+    settle(v)
+    assert len(v._stream.columns) == 0
+    v.close()
@@ -4,7 +4,7 @@ Test for PlotTsGroup.
 import pathlib
 
 import numpy as np
-import pygfx as gfx
+import pynapple as nap
 import pytest
 from PIL import Image
 
@@ -42,3 +42,148 @@ def test_plot_tsgroup_action(dummy_tsgroup, func, kwargs):
     ).convert("RGBA")
     np.allclose(np.array(image), image_data)
 
+
+
+def test_plot_tsgroup_streaming():
+    group = nap.TsGroup(
+        {i: nap.Ts(t=np.sort(np.random.uniform(0, 1000, 20_000))) for i in range(5)}
+    )
+    v = viz.PlotTsGroup(group)
+    try:
+        # Spikes only, whether or not the pyramid is built. The density image is
+        # tested below.
+        v._use_density = lambda start, end: False
+        geometry = v.graphic.geometry
+
+        def assert_window(start, end):
+            expected = [group[c].t[(group[c].t >= start) & (group[c].t < end)] for c in group]
+            n = sum(len(t) for t in expected)
+            assert geometry.times.draw_range == (0, n)
+            np.testing.assert_allclose(
+                geometry.times.data[:n] + v._time_origin, np.concatenate(expected), atol=1e-4
+            )
+            np.testing.assert_array_equal(
+                geometry.units.data[:n], np.repeat(np.arange(5), [len(t) for t in expected])
+            )
+
+        # Only the spikes around the first second
+        start = group.time_support.start[0]
+        assert_window(start - 1, start + 2)
+        assert geometry.times.nitems < 5000
+
+        # Panning within the window keeps it, further reads the new spikes
+        v._stream_spikes(position=(start + 1, 0, 0), width=1)
+        assert v._spike_window == (start - 1, start + 2)
+        v._stream_spikes(position=(500.5, 0, 0), width=1)
+        assert_window(499, 502)
+
+        # Zooming out grows the buffers, zooming back in shrinks them
+        v._stream_spikes(position=(500, 0, 0), width=200)
+        assert_window(200, 800)
+        v._stream_spikes(position=(500, 0, 0), width=1)
+        assert_window(498.5, 501.5)
+        assert geometry.times.nitems < 4096
+    finally:
+        v.close()
+
+
+def test_plot_tsgroup_unit_table(dummy_tsgroup):
+    v = viz.PlotTsGroup(dummy_tsgroup)
+    rows, colors = v.graphic.geometry.rows, v.graphic.geometry.colors
+    n = len(dummy_tsgroup)
+    times = v.graphic.geometry.times.data.copy()
+
+    # Sorting, grouping and hiding only change the unit table, not the spikes
+    v._manager.data["offset"] = np.arange(n)[::-1]
+    v._update("sort_by")
+    np.testing.assert_array_equal(rows.data[:n, 1], np.arange(n)[::-1])
+    v.set_visible({dummy_tsgroup.keys()[0]: False})
+    assert rows.data[0, 2] == 0 and np.all(rows.data[1:n, 2] == 1)
+    np.testing.assert_array_equal(v.graphic.geometry.times.data, times)
+
+    v._set_colors(np.tile(np.float32([1, 0, 0, 1]), (n, 1)))
+    np.testing.assert_array_equal(colors.data[:n], [[1, 0, 0, 1]] * n)
+
+
+def test_plot_tsgroup_density_once_built():
+    group = nap.TsGroup(
+        {i: nap.Ts(t=np.sort(np.random.uniform(0, 1000, 20_000))) for i in range(5)}
+    )
+    v = viz.PlotTsGroup(group)
+    v.controller.set_view(0, 1000, 0, 6)
+
+    # The next draw once the pyramid is built shows the density image
+    v._pyramid.wait_until_done()
+    v.animate()
+    assert v._density_mode and v.density.visible
+    v.close()
+
+
+def test_plot_tsgroup_density_sparse_units():
+    # The image has one row per unit, whatever the spacing of their offsets
+    group = nap.TsGroup(
+        {i: nap.Ts(t=np.sort(np.random.uniform(0, 1000, 20_000))) for i in (0, 20_000)}
+    )
+    v = viz.PlotTsGroup(group)
+    v._pyramid.wait_until_done()
+    v.controller.set_view(0, 1000, -1, 20_001)
+    v._stream_spikes(position=(500, 0, 0), width=1000)
+    assert v._density_mode
+    assert v.density.material.map.texture.data.shape[0] == 2
+    y = v.density.geometry.positions.data[:, 1]
+    np.testing.assert_array_equal(y, [-0.5, -0.5, 0.5, 0.5, 19_999.5, 19_999.5, 20_000.5, 20_000.5])
+    v.animate()
+    v.renderer.snapshot()
+    v.close()
+
+
+def test_plot_tsgroup_density_texture_limit():
+    group = nap.TsGroup(
+        {i: nap.Ts(t=np.sort(np.random.uniform(0, 1000, 2_000))) for i in range(10)}
+    )
+    v = viz.PlotTsGroup(group)
+    v._pyramid.wait_until_done()
+    v._max_texture_size = 4
+    v._stream_spikes(position=(500, 0, 0), width=1000)
+    assert v._density_mode
+
+    # 10 units wrap into 3 blocks of 4 rows, with one merged bin per block
+    t0, bin_width, counts = v._density_counts
+    assert counts.shape[1] <= 4
+    image = v.density.material.map.texture.data
+    assert image.shape[:2] == (4, 3)
+    filled = np.ones((4, 3), dtype=bool)
+    filled[2:, 2] = False
+    np.testing.assert_array_equal(image[..., 3] > 0, filled)
+    assert v.density.local.scale_x == pytest.approx(bin_width * counts.shape[1])
+    v.close()
+
+
+def test_plot_tsgroup_density():
+    group = nap.TsGroup(
+        {i: nap.Ts(t=np.sort(np.random.uniform(0, 1000, 20_000))) for i in range(5)}
+    )
+    v = viz.PlotTsGroup(group)
+    v._pyramid.wait_until_done()
+
+    # Zoomed out, the spike buffers are emptied and the counts are drawn instead
+    v._stream_spikes(position=(500, 0, 0), width=1000)
+    assert v._density_mode and v.density.visible and not v.graphic.visible
+    assert v.graphic.geometry.times.draw_range == (0, 0)
+    t0, width, counts = v._density_counts
+    assert counts.sum() == 5 * 20_000
+    image = v.density.material.map.texture.data
+    assert image.shape[:2] == (5, counts.shape[1])
+    assert np.all(image[..., 3][counts > 0] > 0) and np.all(image[..., 3][counts == 0] == 0)
+
+    # Hiding a unit removes its row and its quad
+    v.set_visible({2: False})
+    np.testing.assert_array_equal(v.density.material.map.texture.data, image[[0, 1, 3, 4]])
+    centers = v.density.geometry.positions.data[:, 1].reshape(-1, 4).mean(1)
+    np.testing.assert_array_equal(centers, [0, 1, 3, 4])
+
+    # Zoomed in, the spikes are back
+    v._stream_spikes(position=(500, 0, 0), width=1)
+    assert not v._density_mode and v.graphic.visible and not v.density.visible
+    assert v.graphic.geometry.times.draw_range[1] > 0
+    v.close()